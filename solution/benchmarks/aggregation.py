@@ -0,0 +1,43 @@
+"""
+Benchmark: order-by-order aggregation against the batched columnar reader with the fused aggregation loop.
+
+Run from the `solution` folder:
+
+    python3 -m benchmarks.aggregation
+"""
+from src import customers, orders, utils
+from src import cohort_customer_segment_tree, customer_cohort_index, cohort_statistics
+
+from benchmarks.utils import read_csv_rows, best_time
+
+# Sample orders file is repeated to get measurable times.
+ORDERS_SCALE = 10
+
+
+def main() -> None:
+    timezone = utils.parse_timezone("-0800")
+
+    cohort_index_builder = cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilder(
+        customers.CustomersReader(iter(read_csv_rows("customers.csv")), timezone))
+    cohort_index_builder.build()
+    customer_index_builder = customer_cohort_index.CustomerIndexBuilder(cohort_index_builder.cohorts)
+    customer_index_builder.build()
+
+    orders_rows = read_csv_rows("orders.csv", ORDERS_SCALE)
+    rows_count = len(orders_rows) - 1
+
+    def aggregator() -> cohort_statistics.CohortStatisticsAggregator:
+        return cohort_statistics.CohortStatisticsAggregator(orders.OrdersReader(iter(orders_rows), timezone),
+                                                            customer_index_builder.customer_index, None)
+
+    order_by_order_seconds = best_time(lambda: aggregator().aggregate_order_by_order())
+    batches_seconds = best_time(lambda: aggregator().aggregate())
+
+    print(f"{rows_count} orders aggregated:")
+    print(f"  order by order: {order_by_order_seconds:.3f}s ({rows_count / order_by_order_seconds:,.0f} rows/s)")
+    print(f"  batches:        {batches_seconds:.3f}s ({rows_count / batches_seconds:,.0f} rows/s)")
+    print(f"  speedup:        {order_by_order_seconds / batches_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: reading orders from the plain CSV file against compressed files, decompressed inline by the parser
+thread, and decompressed on the background thread.
+
+Run from the `solution` folder:
+
+    python3 -m benchmarks.compressed_input
+"""
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import tempfile
+
+from src import input_streams, orders, utils
+
+from benchmarks.utils import read_csv_rows, best_time
+
+# Sample orders file is repeated to get measurable times.
+ORDERS_SCALE = 10
+
+COMPRESSED_FILES = (
+    ("orders.csv.gz", gzip.open),
+    ("orders.csv.bz2", bz2.open),
+    ("orders.csv.xz", lzma.open),
+)
+
+
+def read_orders(text_input: io.TextIOBase, timezone) -> int:
+    """
+    :return: Number of orders read through the batched columnar reader.
+    """
+
+    orders_reader = orders.OrdersReader(csv.reader(text_input), timezone)
+    return sum(len(user_ids) for user_ids, _, _ in orders_reader.order_batches())
+
+
+def main() -> None:
+    timezone = utils.parse_timezone("-0800")
+    orders_rows = read_csv_rows("orders.csv", ORDERS_SCALE)
+    rows_count = len(orders_rows) - 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        plain_file_path = os.path.join(temp_dir, "orders.csv")
+        with open(plain_file_path, "w", newline="") as plain_file:
+            csv.writer(plain_file).writerows(orders_rows)
+
+        def plain() -> int:
+            with open(plain_file_path, newline="") as text_input:
+                return read_orders(text_input, timezone)
+
+        plain_seconds = best_time(plain)
+        print(f"{rows_count} orders read:")
+        print(f"  {'plain file:':<26} {plain_seconds:.3f}s ({rows_count / plain_seconds:,.0f} rows/s)")
+
+        for file_name, opener in COMPRESSED_FILES:
+            file_path = os.path.join(temp_dir, file_name)
+            with open(plain_file_path, "rb") as plain_file, opener(file_path, "wb") as compressed_file:
+                compressed_file.write(plain_file.read())
+
+            def inline() -> int:
+                with opener(file_path, "rt", newline="") as text_input:
+                    return read_orders(text_input, timezone)
+
+            def background() -> int:
+                with input_streams.open_text_input(file_path) as text_input:
+                    return read_orders(text_input, timezone)
+
+            inline_seconds = best_time(inline)
+            background_seconds = best_time(background)
+            print(f"  {file_name + ' inline:':<26} {inline_seconds:.3f}s ({rows_count / inline_seconds:,.0f} rows/s)")
+            print(f"  {file_name + ' background:':<26} {background_seconds:.3f}s "
+                  f"({rows_count / background_seconds:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: customer ID to cohort ID lookup, the original walk over cohort trees against one `bisect` over
+the flat segments of all cohorts, and the dense direct-address table.
+
+Cohort customer ID ranges interleave more with the increasing share of customers created out of the order. With
+all cohorts interleaved, the original lookup walks down every cohort.
+
+Run from the `solution` folder:
+
+    python3 -m benchmarks.customer_lookup
+"""
+import random
+
+from src import customers, utils
+from src import cohort_customer_segment_tree, customer_cohort_index
+
+from benchmarks.utils import generate_customers_rows, best_time
+
+CUSTOMERS_COUNT = 50000
+COHORTS_COUNT = 50
+LOOKUPS_COUNT = 50000
+
+OUT_OF_ORDER_SHARES = (0.0, 0.1, 1.0)
+
+
+def main() -> None:
+    timezone = utils.parse_timezone("+0000")
+    random_generator = random.Random(7)
+
+    # Lookups include unknown customer IDs, below and above the known range.
+    customer_ids = [random_generator.randrange(-1000, CUSTOMERS_COUNT + 1000) for _ in range(LOOKUPS_COUNT)]
+
+    print(f"{LOOKUPS_COUNT} lookups among {CUSTOMERS_COUNT} customers in {COHORTS_COUNT} cohorts:")
+    for out_of_order_share in OUT_OF_ORDER_SHARES:
+        cohort_index_builder = cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilder(
+            customers.CustomersReader(iter(generate_customers_rows(CUSTOMERS_COUNT, COHORTS_COUNT,
+                                                                   out_of_order_share)), timezone))
+        cohort_index_builder.build()
+        index = customer_cohort_index.CustomerSegmentsCohortIndex(sorted(cohort_index_builder.cohorts.values()),
+                                                                  cohort_index_builder.cohorts)
+
+        trees_seconds = best_time(lambda: [index.try_get_cohort_id_by_cohort_trees(customer_id)
+                                           for customer_id in customer_ids])
+        flat_seconds = best_time(lambda: [index.try_get_cohort_id_by_customer_id(customer_id)
+                                          for customer_id in customer_ids])
+        dense_index = customer_cohort_index.CustomerDenseCohortIndex(index.cohort_index, index.cohorts)
+        dense_seconds = best_time(lambda: [dense_index.try_get_cohort_id_by_customer_id(customer_id)
+                                           for customer_id in customer_ids])
+
+        print(f"  out of order {out_of_order_share:>4.0%}, {len(index.segment_starts):>6} segments: "
+              f"cohort trees {trees_seconds:.3f}s, flat segments {flat_seconds:.3f}s, "
+              f"dense table {dense_seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
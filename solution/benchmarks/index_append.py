@@ -0,0 +1,74 @@
+"""
+Benchmark: appending a daily tail of new customers into the saved customer index, against rebuilding the index out of
+all customers.
+
+The append reads only new customers into cohort trees, flattens only their cohorts, and merges them with the loaded
+flat segments. Both indexes are checked to be the same.
+
+Run from the `solution` folder:
+
+    python3 -m benchmarks.index_append
+"""
+import os
+import tempfile
+
+from src import customers, utils
+from src import cohort_customer_segment_tree, customer_cohort_index, customer_index_file
+
+from benchmarks.utils import generate_customers_rows, best_time
+
+CUSTOMERS_COUNT = 200000
+COHORTS_COUNT = 200
+OUT_OF_ORDER_SHARE = 0.01
+
+NEW_CUSTOMERS_SHARES = (0.001, 0.01, 0.1)
+
+
+def build_cohorts(rows, timezone) -> dict:
+    cohort_index_builder = cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilder(
+        customers.CustomersReader(iter(rows), timezone))
+    cohort_index_builder.build()
+    return cohort_index_builder.cohorts
+
+
+def main() -> None:
+    timezone = utils.parse_timezone("+0000")
+    rows = generate_customers_rows(CUSTOMERS_COUNT, COHORTS_COUNT, OUT_OF_ORDER_SHARE)
+
+    print(f"{CUSTOMERS_COUNT} customers in {COHORTS_COUNT} cohorts, {OUT_OF_ORDER_SHARE:.0%} out of order:")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_file_path = os.path.join(temp_dir, "customers.index")
+        for new_customers_share in NEW_CUSTOMERS_SHARES:
+            split = len(rows) - int(CUSTOMERS_COUNT * new_customers_share)
+            history_rows, new_rows = rows[:split], rows[:1] + rows[split:]
+            customer_index_file.save_customer_index(
+                index_file_path, customer_cohort_index.CustomerIndexBuilder(build_cohorts(history_rows, timezone),
+                                                                            dense_min_density=2).build(), timezone)
+
+            def rebuild() -> customer_cohort_index.CustomerSegmentsCohortIndex:
+                return customer_cohort_index.CustomerIndexBuilder(build_cohorts(rows, timezone),
+                                                                  dense_min_density=2).build()
+
+            def append() -> customer_cohort_index.CustomerSegmentsCohortIndex:
+                cohorts, segments = customer_index_file.load_customer_index(index_file_path, timezone)
+                cohorts, segments = customer_index_file.append_cohorts(cohorts, segments,
+                                                                       build_cohorts(new_rows, timezone))
+                return customer_cohort_index.CustomerIndexBuilder(cohorts, segments=segments,
+                                                                  dense_min_density=2).build()
+
+            rebuilt_index = rebuild()
+            appended_index = append()
+            assert list(rebuilt_index.segment_starts) == list(appended_index.segment_starts)
+            assert list(rebuilt_index.segment_ends) == list(appended_index.segment_ends)
+            assert list(rebuilt_index.segment_cohort_ids) == list(appended_index.segment_cohort_ids)
+            assert {cohort_id: cohort.get_unique_customer_count() for cohort_id, cohort in
+                    rebuilt_index.cohorts.items()} == \
+                {cohort_id: cohort.get_unique_customer_count() for cohort_id, cohort in
+                 appended_index.cohorts.items()}
+
+            print(f"  {len(new_rows) - 1:>6} new customers: rebuild {best_time(rebuild):.3f}s, "
+                  f"append {best_time(append):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
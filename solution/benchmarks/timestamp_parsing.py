@@ -0,0 +1,65 @@
+"""
+Microbenchmark: `strptime` based date/time parsing against the `UtcTimestampParser` integer fast path.
+
+Run from the `solution` folder:
+
+    python3 -m benchmarks.timestamp_parsing
+"""
+import random
+from datetime import datetime, timezone as fixed_timezone, tzinfo
+from typing import List
+
+from src import utils
+
+from benchmarks.utils import best_time
+
+ROWS_COUNT = 100000
+
+
+def generate_date_strings(rows_count: int) -> List[str]:
+    """
+    Random UTC date/time strings spread over two years, in the layout of orders and customers files.
+    """
+
+    random.seed(1)
+    start = 1420070400  # 2015-01-01 00:00:00
+    return [datetime.fromtimestamp(start + random.randrange(2 * 365 * 24 * 3600), fixed_timezone.utc).strftime(
+        "%Y-%m-%d %H:%M:%S") for __ in range(rows_count)]
+
+
+def strptime_path(date_strings: List[str], timezone: tzinfo) -> None:
+    for date_str in date_strings:
+        utils.calculate_week_id(utils.parse_utc_datetime_with_timezone(date_str, timezone).date())
+
+
+def fast_path(date_strings: List[str], timezone: tzinfo) -> None:
+    parser = utils.UtcTimestampParser(timezone)
+    for date_str in date_strings:
+        parser.parse(date_str)
+
+
+def main() -> None:
+    date_strings = generate_date_strings(ROWS_COUNT)
+    timezone = utils.parse_timezone("-0800")
+
+    strptime_seconds = best_time(lambda: strptime_path(date_strings, timezone))
+    fast_seconds = best_time(lambda: fast_path(date_strings, timezone))
+
+    print(f"{ROWS_COUNT} date/time strings parsed into week IDs:")
+    print(f"  strptime path: {strptime_seconds:.3f}s ({ROWS_COUNT / strptime_seconds:,.0f} rows/s)")
+    print(f"  fast path:     {fast_seconds:.3f}s ({ROWS_COUNT / fast_seconds:,.0f} rows/s)")
+    print(f"  speedup:       {strptime_seconds / fast_seconds:.1f}x")
+
+    # Daylight saving time timezone: the fast path pays one `bisect` in the offset transitions table per row.
+    dst_timezone = utils.parse_timezone("America/Los_Angeles")
+    dst_strptime_seconds = best_time(lambda: strptime_path(date_strings, dst_timezone))
+    dst_fast_seconds = best_time(lambda: fast_path(date_strings, dst_timezone))
+
+    print(f"Same strings in 'America/Los_Angeles':")
+    print(f"  strptime path: {dst_strptime_seconds:.3f}s ({ROWS_COUNT / dst_strptime_seconds:,.0f} rows/s)")
+    print(f"  fast path:     {dst_fast_seconds:.3f}s ({ROWS_COUNT / dst_fast_seconds:,.0f} rows/s)")
+    print(f"  speedup:       {dst_strptime_seconds / dst_fast_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: memory retained by the cohort customer segments trees, in bytes per customer, measured with `tracemalloc`.
+
+Customers are generated with an increasing share of customer IDs created out of the order, which fragments
+cohort customer ID segments into more tree nodes.
+
+Run from the `solution` folder:
+
+    python3 -m benchmarks.tree_memory
+"""
+import tracemalloc
+
+from src import customers, utils
+from src import cohort_customer_segment_tree
+
+from benchmarks.utils import generate_customers_rows
+
+CUSTOMERS_COUNT = 200000
+COHORTS_COUNT = 50
+
+# Share of customers created in a random cohort, instead of the cohort that follows the customer ID order.
+OUT_OF_ORDER_SHARES = (0.0, 0.01, 0.1, 0.5)
+
+
+def main() -> None:
+    timezone = utils.parse_timezone("+0000")
+
+    print(f"{CUSTOMERS_COUNT} customers in {COHORTS_COUNT} cohorts:")
+    for out_of_order_share in OUT_OF_ORDER_SHARES:
+        customer_list = list(customers.CustomersReader(iter(generate_customers_rows(CUSTOMERS_COUNT, COHORTS_COUNT, out_of_order_share)),
+                                                       timezone).customers())
+
+        tracemalloc.start()
+        tree_builder = cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilder(None)
+        for customer in customer_list:
+            tree_builder.add_customer(customer)
+        tree_bytes, _ = tracemalloc.get_traced_memory()
+        tree_builder.flatten()
+        total_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        segments_count = sum(len(tree.segments) for tree in tree_builder.cohorts.values())
+        print(f"  out of order {out_of_order_share:>4.0%}: {segments_count:>7} segments, "
+              f"trees {tree_bytes / CUSTOMERS_COUNT:>6.1f} B/customer, "
+              f"with flattened segments {total_bytes / CUSTOMERS_COUNT:>6.1f} B/customer, "
+              f"peak {peak_bytes / CUSTOMERS_COUNT:>6.1f} B/customer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import csv
+import os
+import random
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+import src
+
+
+def data_file_path(file_name: str) -> str:
+    """
+    :param file_name: Name of the sample file in the `data` folder.
+    :return: Path to the sample file.
+    """
+
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(src.__file__))), "data", file_name)
+
+
+def read_csv_rows(file_name: str, scale: int = 1) -> List[List[str]]:
+    """
+    Read the sample file into memory, to keep the disk I/O out of measurements.
+
+    :param file_name: Name of the sample file in the `data` folder.
+    :param scale: Number of times to repeat the data rows.
+    :return: Header row followed by data rows.
+    """
+
+    with open(data_file_path(file_name)) as csv_file:
+        rows = list(csv.reader(csv_file))
+    return rows[:1] + rows[1:] * scale
+
+
+def best_time(function: Callable[[], object], repeat: int = 3) -> float:
+    """
+    :return: The best wall clock time of `repeat` calls of the `function` in seconds.
+    """
+
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def generate_customers_rows(customers_count: int, cohorts_count: int, out_of_order_share: float,
+                            seed: int = 42) -> List[List[str]]:
+    """
+    Generate customers with increasing IDs in increasing weekly cohorts, except for a share of customers created in
+    a random cohort. Out of the order customers fragment cohort customer ID segments, and interleave cohort ID ranges.
+
+    :param customers_count: Number of customers.
+    :param cohorts_count: Number of weekly cohorts.
+    :param out_of_order_share: Share of customers created in a random cohort, `1.0` interleaves all cohorts.
+    :param seed: Random generator seed, the same seed generates the same rows.
+    :return: Header row followed by customer rows, in the customers CSV file format.
+    """
+
+    random_generator = random.Random(seed)
+    first_week = datetime(2015, 1, 4)
+    customers_per_cohort = customers_count // cohorts_count
+
+    rows = [["id", "created"]]
+    for customer_id in range(1, customers_count + 1):
+        if random_generator.random() < out_of_order_share:
+            cohort = random_generator.randrange(cohorts_count)
+        else:
+            cohort = min(customer_id // customers_per_cohort, cohorts_count - 1)
+        created = first_week + timedelta(weeks=cohort, seconds=random_generator.randrange(7 * 24 * 3600))
+        rows.append([str(customer_id), created.strftime("%Y-%m-%d %H:%M:%S")])
+    return rows
@@ -2,6 +2,7 @@ import csv
 from unittest import TestCase, mock
 
 import src.main as main
+import src.csv_scanner as csv_scanner
 import src.utils as utils
 
 import tests.utils
@@ -54,3 +55,39 @@ class TestE2E(TestCase):
 
         self.assertEqual(57, file_writer_mock.writerow.call_count)
         self.assertEqual(10, len(file_writer_mock.method_calls[0][1][0]))
+
+    def test_e2e_mmap_input_engine(self):
+        timezone = utils.parse_timezone("-0500")
+        csv_writer_mock = mock.Mock()
+        scanner_writer_mock = mock.Mock()
+
+        customers_file_path = "fixtures/customers.csv"
+        orders_file_path = "fixtures/orders.csv"
+
+        with tests.utils.suppress_stdout(), open(customers_file_path) as customers_csv_file, \
+                open(orders_file_path) as orders_csv_file:
+            main.generate_cohort_report(csv.reader(customers_csv_file), csv.reader(orders_csv_file), csv_writer_mock,
+                                        timezone, None)
+
+        with tests.utils.suppress_stdout(), \
+                csv_scanner.MappedCsvScanner.open(customers_file_path) as customers_scanner, \
+                csv_scanner.MappedCsvScanner.open(orders_file_path) as orders_scanner:
+            main.generate_cohort_report(customers_scanner, orders_scanner, scanner_writer_mock, timezone, None)
+
+        self.assertEqual(csv_writer_mock.writerow.call_args_list, scanner_writer_mock.writerow.call_args_list)
+
+    def test_e2e_parallel_workers(self):
+        timezone = utils.parse_timezone("-0500")
+        serial_writer_mock = mock.Mock()
+        parallel_writer_mock = mock.Mock()
+
+        customers_file_path = "fixtures/customers.csv"
+        orders_file_path = "fixtures/orders.csv"
+
+        for writer_mock, workers in [(serial_writer_mock, 1), (parallel_writer_mock, 3)]:
+            with tests.utils.suppress_stdout(), open(customers_file_path) as customers_csv_file, \
+                    open(orders_file_path) as orders_csv_file:
+                main.generate_cohort_report(csv.reader(customers_csv_file), csv.reader(orders_csv_file), writer_mock,
+                                            timezone, 8, workers=workers, orders_file_path=orders_file_path)
+
+        self.assertEqual(serial_writer_mock.writerow.call_args_list, parallel_writer_mock.writerow.call_args_list)
@@ -5,7 +5,7 @@ from typing import Dict, Tuple, List, Callable
 from bisect import bisect
 
 from src import customers
-from src.utils import ComparisonMixin, week_start_date, calculate_week_id
+from src.utils import ComparisonMixin, week_start_date_by_week_id
 
 
 class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
@@ -28,8 +28,13 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
 
     Otherwise, if list was used, the complexity of `insert` and `del` list operations
     would produce an algorithm with the `O(N^2)` complexity.
+
+    There is a node per customer ID segment, so nodes use `__slots__`, and keep segment and subtree range
+    boundaries in `int` fields updated in place, instead of replacing tuples on every change.
     """
 
+    __slots__ = ("segment_start", "segment_end", "subtree", "subtree_range_start", "subtree_range_end")
+
     def __init__(self, customer_id: int, child_node: CohortCustomerSegmentsTreeBuilderNode = None) -> None:
         """
         :param customer_id: the initial customer_id for the node. The starting segment is (customer_id, customer_id)
@@ -37,7 +42,8 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         """
 
         # Continuous customer IDs this node contains.
-        self.segment: Tuple[int, int] = (customer_id, customer_id)
+        self.segment_start: int = customer_id
+        self.segment_end: int = customer_id
 
         # Tree children of this node.
         self.subtree: List[CohortCustomerSegmentsTreeBuilderNode] = [child_node] if child_node else []
@@ -45,13 +51,29 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         # The total node IDs range, minimm and maximum. It is unique (disjunct with all other nodes).
         # Any customer_id that comes into the tree and is within this range will be placed somewhere in the subtree
         # under this node.
-        self.subtree_range: Tuple[int, int] = (
-            customer_id, child_node.subtree_range[1] if child_node else customer_id)
+        self.subtree_range_start: int = customer_id
+        self.subtree_range_end: int = child_node.subtree_range_end if child_node else customer_id
 
         # Since this is the last (and first) node, we will extend own subtree list with its children
         if child_node:
             self._expand_last_node_children()
 
+    @property
+    def segment(self) -> Tuple[int, int]:
+        """
+        :return: Continuous customer IDs this node contains, as `(start, end)` tuple.
+        """
+
+        return self.segment_start, self.segment_end
+
+    @property
+    def subtree_range(self) -> Tuple[int, int]:
+        """
+        :return: The total node IDs range, as `(minimum, maximum)` tuple.
+        """
+
+        return self.subtree_range_start, self.subtree_range_end
+
     def __lt__(self, other: CohortCustomerSegmentsTreeBuilderNode) -> bool:
         """
         The comparison methods are used by `bisect` to find the position
@@ -61,7 +83,7 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         :return: `True` if this object subtree lowest `customer_id` is less than `other` lowest `customer_id`.
         """
 
-        return self.segment[0] < other.segment[0]
+        return self.segment_start < other.segment_start
 
     def __eq__(self, other: CohortCustomerSegmentsTreeBuilderNode) -> bool:
         """
@@ -72,7 +94,7 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         :return: `True` if this object subtree lowest `customer_id` is equal to `other` lowest `customer_id`.
         """
 
-        return self.segment[0] == other.segment[0]
+        return self.segment_start == other.segment_start
 
     def _try_expand_subtree_range_maximum(self, customer_id: int) -> None:
         """
@@ -81,8 +103,8 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         :param customer_id: ID that being added to the subtree.
         """
 
-        if customer_id > self.subtree_range[1]:
-            self.subtree_range = (self.subtree_range[0], customer_id)
+        if customer_id > self.subtree_range_end:
+            self.subtree_range_end = customer_id
 
     def _expand_last_node_children(self) -> None:
         """
@@ -97,7 +119,8 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
             current_last_node = self.subtree[-1]
             self.subtree.extend(current_last_node.subtree)
             current_last_node.subtree = []
-            current_last_node.subtree_range = current_last_node.segment
+            current_last_node.subtree_range_start = current_last_node.segment_start
+            current_last_node.subtree_range_end = current_last_node.segment_end
 
     def _consolidate_after_last_child_removed(self) -> None:
         """
@@ -109,11 +132,11 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         """
 
         if len(self.subtree) > 0:
-            max_subtree_customer_id = self.subtree[-1].subtree_range[1]
+            max_subtree_customer_id = self.subtree[-1].subtree_range_end
             self._expand_last_node_children()
         else:
-            max_subtree_customer_id = self.segment[1]
-        self.subtree_range = (self.subtree_range[0], max_subtree_customer_id)
+            max_subtree_customer_id = self.segment_end
+        self.subtree_range_end = max_subtree_customer_id
 
     def _remove_last_node(self, index: int = -1) -> CohortCustomerSegmentsTreeBuilderNode:
         """
@@ -123,20 +146,31 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         When `index` node has children, it will be any of the last children in the list, since the last one has
         the highest segment, and that segment is the one to be merged. (Hard to explain by only writing text :).
 
+        Iterative: the path down to the leaf is walked in a loop, and nodes that lost their last child are kept on
+        an explicit stack, to consolidate them bottom-up afterward.
+
         :param index: The left (lower) node that is being merged, or -1 for the last child.
         :return: The removed node.
         """
 
-        # If leaf node than pop it from the list.
-        if len(self.subtree[index].subtree) == 0:
-            last_node = self.subtree.pop(index)
-        else:
-            # Otherwise, look recursively for the leaf node of the last child.
-            last_node = self.subtree[index]._remove_last_node()
+        # Nodes that remove their last child, and have to consolidate their structure to keep tree consistency.
+        consolidate_stack = []
 
-        # When we remove the last child node, self node has to consolidate its structure to keep tree consistency.
+        # Look for the leaf node down the last children of the `index` child.
+        node = self
+        while len(node.subtree[index].subtree) > 0:
+            if index == -1:
+                consolidate_stack.append(node)
+            node = node.subtree[index]
+            index = -1
+
+        # Leaf node is popped from the list.
+        last_node = node.subtree.pop(index)
         if index == -1:
-            self._consolidate_after_last_child_removed()
+            consolidate_stack.append(node)
+
+        while consolidate_stack:
+            consolidate_stack.pop()._consolidate_after_last_child_removed()
 
         return last_node
 
@@ -149,13 +183,13 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         :param index: Index of the lower node of the two being merged. The caller ensures 0 <= index < len - 1.
         """
 
-        if self.subtree[index].subtree_range[1] + 1 == self.subtree[index + 1].subtree_range[0]:
+        if self.subtree[index].subtree_range_end + 1 == self.subtree[index + 1].subtree_range_start:
             # Take reference to the upper (right) node to update its segments afterward.
             # We actually do not know which node will be removed, the lower or one of nodes in the subtree.
             new_node = self.subtree[index + 1]
             removed_last_node = self._remove_last_node(index=index)
-            new_node.segment = (removed_last_node.segment[0], new_node.segment[1])
-            new_node.subtree_range = (removed_last_node.segment[0], new_node.subtree_range[1])
+            new_node.segment_start = removed_last_node.segment_start
+            new_node.subtree_range_start = removed_last_node.segment_start
 
     def _try_merge_with_first_child(self) -> None:
         """
@@ -164,11 +198,11 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         If yes, merge: remove the first child, and expand the node segment upper boundary.
         """
 
-        if self.segment[1] + 1 == self.subtree[0].segment[0]:
+        if self.segment_end + 1 == self.subtree[0].segment_start:
             first_child = self.subtree[0]
             # The only operation on the list with complexity greater than O(1).
             # But the scope is limited to the one node child list, which is less than O(log N)
-            self.segment = (self.segment[0], first_child.segment[1])
+            self.segment_end = first_child.segment_end
             first_child.subtree.extend(self.subtree[1:])
             self.subtree = first_child.subtree
 
@@ -180,9 +214,9 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         :return: True if customer_id is adjacent and segment is expanded.
         """
 
-        if customer_id + 1 == self.segment[0]:
-            self.segment = (customer_id, self.segment[1])
-            self.subtree_range = (customer_id, self.subtree_range[1])
+        if customer_id + 1 == self.segment_start:
+            self.segment_start = customer_id
+            self.subtree_range_start = customer_id
             return True
         return False
 
@@ -200,8 +234,8 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         :return: True if customer_id is adjacent and segment is expanded.
         """
 
-        if customer_id - 1 == self.segment[1]:
-            self.segment = (self.segment[0], customer_id)
+        if customer_id - 1 == self.segment_end:
+            self.segment_end = customer_id
             if len(self.subtree) > 0:
                 self._try_merge_with_first_child()
             elif try_merge_with_next_sibling is not None:
@@ -218,6 +252,10 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
             2. expand one of children segments
             3. find a not-last child to append it
 
+        Iterative: the method walks down the tree in a loop. Nodes that went down into their last child are kept on
+        an explicit stack, to expand their last child children bottom-up once the customer ID is placed. The merge
+        with the next sibling is tracked as the parent node and the lower child index, instead of a callback per level.
+
         This method assumes, but does not validates:
         1. the `customer_id` is currently not in the tree.
         2. the `customer_id` is not less than the current minimum ID -
@@ -229,91 +267,115 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
                 that will merge two customer ID segments into one if adjacent.
         """
 
-        # We are adding this customer ID to the subtree structure, no way around.
-        # And it can be only greater than the lower boundary, so check if it is expanding the upper boundary
-        self._try_expand_subtree_range_maximum(customer_id)
-
-        # Try simple operations first - just expand the upper boundary of the segment.
-        # If needed, the method is also performing needed merges with the first child or the next sibling.
-        if self._try_expand_segment_end(customer_id, try_merge_with_next_sibling=try_merge_with_next_sibling):
-            return
+        # Nodes that went down into the last child, and expand its children into their own subtree afterward.
+        expand_stack = []
 
-        # Edge case: no children - just add the child.
-        if len(self.subtree) == 0:
-            self.subtree = [(CohortCustomerSegmentsTreeBuilderNode(customer_id))]
+        # The parent node and the index of its lower child to merge with the next sibling, when set.
+        # Otherwise, the merge is left to the caller `try_merge_with_next_sibling`.
+        merge_parent = None
+        merge_index = 0
 
-            # Maybe we reached the limits of our adjacent segment and we want to merge.
-            if try_merge_with_next_sibling is not None:
+        def merge_with_next_sibling() -> None:
+            if merge_parent is not None:
+                merge_parent._try_merge_nodes_with_adjacent_segments(merge_index)
+            elif try_merge_with_next_sibling is not None:
                 try_merge_with_next_sibling()
-            return
-
-        # One of the children will take it. Children are ordered by the segment start.
-        # Find the index of the first child that has the lower segment boundary greater than customer_id
-        # subtree[insertion_index - 1].segment[0] < customer_id < subtree[insertion_index].segment[0]
-        insertion_index = bisect(self.subtree, CohortCustomerSegmentsTreeBuilderNode(customer_id))
-        is_beyond_last = insertion_index == len(self.subtree)
-
-        # `bisect` returned customer_id greater than all children segment starts.
-        # '+ 1' tells us that we will be able to expand the last child segment instead of appending a new element.
-        if is_beyond_last and customer_id > self.subtree[-1].subtree_range[1] + 1:
-            # Customer_id still might be in the range of the last child segment.
-            # then append new child with (customer_id, customer_id) as the last child.
+
+        node = self
+        while True:
+            # We are adding this customer ID to the subtree structure, no way around.
+            # And it can be only greater than the lower boundary, so check if it is expanding the upper boundary
+            node._try_expand_subtree_range_maximum(customer_id)
+
+            # Try simple operations first - just expand the upper boundary of the segment.
+            # If needed, the method is also performing needed merges with the first child or the next sibling.
+            if node._try_expand_segment_end(customer_id, try_merge_with_next_sibling=merge_with_next_sibling):
+                break
+
+            # Edge case: no children - just add the child.
+            if len(node.subtree) == 0:
+                node.subtree = [(CohortCustomerSegmentsTreeBuilderNode(customer_id))]
+
+                # Maybe we reached the limits of our adjacent segment and we want to merge.
+                merge_with_next_sibling()
+                break
+
+            # One of the children will take it. Children are ordered by the segment start.
+            # Find the index of the first child that has the lower segment boundary greater than customer_id
+            # subtree[insertion_index - 1].segment[0] < customer_id < subtree[insertion_index].segment[0]
+            insertion_index = bisect(node.subtree, CohortCustomerSegmentsTreeBuilderNode(customer_id))
+            is_beyond_last = insertion_index == len(node.subtree)
+
+            # `bisect` returned customer_id greater than all children segment starts.
+            # '+ 1' tells us that we will be able to expand the last child segment instead of appending a new element.
+            if is_beyond_last and customer_id > node.subtree[-1].subtree_range_end + 1:
+                # Customer_id still might be in the range of the last child segment.
+                # then append new child with (customer_id, customer_id) as the last child.
+                # This is the place where having a tree pays off: this is O(1),
+                # otherwise would be list.insert with O(N).
+                node.subtree.append(CohortCustomerSegmentsTreeBuilderNode(customer_id))
+                merge_with_next_sibling()
+                break
+
+            # Now, we focus on the previous child.
+            # That is the last child with segment start lower than customer_id, or `insertion_index - 1`
+            if insertion_index > 0:
+                if is_beyond_last:
+                    # The last child keeps the merge of this node, and this node expands its children afterward.
+                    expand_stack.append(node)
+                else:
+                    merge_parent = node
+                    merge_index = insertion_index - 1
+                node = node.subtree[insertion_index - 1]
+                continue
+
+            # The only case left is the first child has a greater lower boundary than customer_id.
+            # If we cannot just expand the lower boundary,
+            # we need to have the first child with segment (customer_id, customer_id).
             # This is the place where having a tree pays off: this is O(1),
-            # otherwise would be list.insert with O(N).
-            self.subtree.append(CohortCustomerSegmentsTreeBuilderNode(customer_id))
-            if try_merge_with_next_sibling is not None:
-                try_merge_with_next_sibling()
-            return
-
-        # Now, we focus on the previous child.
-        # That is the last child with segment start lower than customer_id, or `insertion_index - 1`
-        if insertion_index > 0:
-            self.subtree[insertion_index - 1]. \
-                add_customer(customer_id,
-                             try_merge_with_next_sibling=try_merge_with_next_sibling if is_beyond_last else
-                             lambda: self._try_merge_nodes_with_adjacent_segments(insertion_index - 1))
-            if is_beyond_last:
-                self._expand_last_node_children()
-            return
-
-        # The only case left is the first child has a greater lower boundary than customer_id.
-        # If we cannot just expand the lower boundary,
-        # we need to have the first child with segment (customer_id, customer_id).
-        # This is the place where having a tree pays off: this is O(1),
-        # otherwise it would be list.insert with O(N).
-        if not self.subtree[0].try_expand_segment_start(customer_id):
-            self.subtree[0] = CohortCustomerSegmentsTreeBuilderNode(customer_id, child_node=self.subtree[0])
+            # otherwise it would be list.insert with O(N).
+            if not node.subtree[0].try_expand_segment_start(customer_id):
+                node.subtree[0] = CohortCustomerSegmentsTreeBuilderNode(customer_id, child_node=node.subtree[0])
+            break
+
+        while expand_stack:
+            expand_stack.pop()._expand_last_node_children()
 
     def has_customer_id(self, customer_id: int) -> bool:
         """
-        Preorder (visit root node first) recursive method to check if `customer_id` is in this subtree.
+        Preorder (visit root node first) iterative method to check if `customer_id` is in this subtree.
 
         :param customer_id:
         :return: `True` if `customer_id` is found in this node or any of the subtree nodes segments.
         """
 
-        if customer_id < self.subtree_range[0] or customer_id > self.subtree_range[1]:
-            return False
+        node = self
+        while True:
+            if customer_id < node.subtree_range_start or customer_id > node.subtree_range_end:
+                return False
 
-        if self.segment[0] <= customer_id <= self.segment[1]:
-            return True
+            if node.segment_start <= customer_id <= node.segment_end:
+                return True
 
-        index = bisect(self.subtree, CohortCustomerSegmentsTreeBuilderNode(customer_id)) - 1
-        if index == -1:
-            return False
+            index = bisect(node.subtree, CohortCustomerSegmentsTreeBuilderNode(customer_id)) - 1
+            if index == -1:
+                return False
 
-        return self.subtree[index].has_customer_id(customer_id)
+            node = node.subtree[index]
 
     def get_unique_customer_count(self) -> int:
         """
-        Preorder (visit root node first) recursive method to calculate the unique customer IDs count.
+        Iterative method to calculate the unique customer IDs count, with an explicit stack of nodes to visit.
 
         :return: summed up subtree unique customer count.
         """
 
-        count = self.segment[1] - self.segment[0] + 1
-        for child in self.subtree:
-            count += child.get_unique_customer_count()
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += node.segment_end - node.segment_start + 1
+            stack.extend(node.subtree)
 
         return count
 
@@ -321,13 +383,17 @@ class CohortCustomerSegmentsTreeBuilderNode(ComparisonMixin):
         """
         Preorder (visit root first) traversal of the tree to produce output from lower to higher segments.
 
+        Iterative, with an explicit stack of nodes to visit. Children are pushed in reverse order, so the lowest child
+        is visited first.
+
         :param collect_segment: lambda which collects segments into an array on the root node level.
         """
 
-        collect_segment(self.segment)
-
-        for child in self.subtree:
-            child.flatten(collect_segment)
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            collect_segment(node.segment)
+            stack.extend(reversed(node.subtree))
 
 
 class CohortCustomerSegmentsTreeBuilderRootNode(ComparisonMixin):
@@ -338,6 +404,8 @@ class CohortCustomerSegmentsTreeBuilderRootNode(ComparisonMixin):
     Manages true root node creation and tree initialization.
     """
 
+    __slots__ = ("root_node", "segments", "unique_customers_count")
+
     def __init__(self, customer_id: int = None) -> None:
         """
         Root node wrapper to handle a bit different add_customer processing and supports an empty state (no segment)
@@ -370,7 +438,7 @@ class CohortCustomerSegmentsTreeBuilderRootNode(ComparisonMixin):
 
         if self.root_node is None:
             self.root_node = CohortCustomerSegmentsTreeBuilderNode(customer_id)
-        elif customer_id + 1 < self.root_node.segment[0]:
+        elif customer_id + 1 < self.root_node.segment_start:
             self.root_node = CohortCustomerSegmentsTreeBuilderNode(customer_id, child_node=self.root_node)
         elif not self.root_node.try_expand_segment_start(customer_id) and \
                 not self.root_node.has_customer_id(customer_id):
@@ -387,7 +455,7 @@ class CohortCustomerSegmentsTreeBuilderRootNode(ComparisonMixin):
         :return: `True` if underlying tree or `segments` contain a segment that includes `customer_id`.
         """
 
-        if customer_id < self.root_node.subtree_range[0] or customer_id > self.root_node.subtree_range[1]:
+        if customer_id < self.root_node.subtree_range_start or customer_id > self.root_node.subtree_range_end:
             return False
 
         if self.segments is None:
@@ -463,12 +531,14 @@ class CohortCustomerSegmentsTreeBuilderRootNode(ComparisonMixin):
         :return: customer IDs maximum in this cohort.
         """
 
-        return self.root_node.subtree_range[1]
+        return self.root_node.subtree_range_end
 
 
 class CohortInfo:
     """Cohort info used by the report generator."""
 
+    __slots__ = ("cohort_id", "cohort_week_start")
+
     def __init__(self, cohort_id: int, cohort_week_start: date) -> None:
         """
         Cohort ID and cohort week start date are used by the report generator to print the cohort date.
@@ -481,13 +551,18 @@ class CohortInfo:
         self.cohort_week_start = cohort_week_start
 
 
-class CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo(CohortInfo, CohortCustomerSegmentsTreeBuilderRootNode):
+class CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo(CohortCustomerSegmentsTreeBuilderRootNode):
     """
     Combines segments tree root node with cohort info.
 
     Used by the report generator, when making a lookup by `customer_id`.
+
+    Two base classes with non-empty `__slots__` cannot be combined, so this class declares `CohortInfo` fields
+    by itself, and initializes them with `CohortInfo.__init__`.
     """
 
+    __slots__ = CohortInfo.__slots__
+
     def __init__(self, customer_id: int, cohort_id: int, cohort_week_start: date) -> None:
         """
 
@@ -548,22 +623,21 @@ class CohortCustomerSegmentsTreeBuilder:
         Tree structure consolidates itself with each call, and can be used for lookup at any given moment.
         The complexity of the method is `O(logN)`.
 
-        1. Calculates cohort ID from customer creation date.
+        1. Takes cohort ID from the customer creation week.
         2. Adds cohort tree when not found for cohort ID.
         3. Invokes `add_customer` for the underlying cohort tree.
 
         :param customer: customer being added.
         """
 
-        week_start = week_start_date(customer.created.date())
-        customer_cohort_id = calculate_week_id(customer.created.date())
+        customer_cohort_id = customer.week_id
         cohort_customer_id_segment_node = self.cohorts.get(
             customer_cohort_id, None)
         if cohort_customer_id_segment_node is None:
             self.cohorts[customer_cohort_id] = \
                 CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo(customer.customer_id,
                                                                         customer_cohort_id,
-                                                                        week_start
+                                                                        week_start_date_by_week_id(customer_cohort_id)
                                                                         )
         else:
             cohort_customer_id_segment_node.add_customer(customer.customer_id)
@@ -1,7 +1,7 @@
-from datetime import date
-from typing import Dict
+from __future__ import annotations
+
+from typing import Dict, Sequence
 
-from src.utils import week_start_date, calculate_week_id
 import src.orders as orders
 import src.customer_cohort_index as customer_cohort_index
 
@@ -104,6 +104,39 @@ class CohortStatistics:
 
         return True
 
+    def merge(self, other: CohortStatistics) -> None:
+        """
+        Merge statistics aggregated over another part of orders into this object.
+
+        Per cohort/week user sets are united, and min/max week IDs and max weeks range are expanded.
+        Both objects must not be post-processed yet. Call `post_processing` once, after all parts are merged.
+        The result does not depend on the order parts are merged in.
+
+        :param other: Statistics aggregated over another part of orders. Its sets may be taken over by this object.
+        """
+
+        if other.max_weeks_range > self.max_weeks_range:
+            self.max_weeks_range = other.max_weeks_range
+
+        for cohort_id, other_cohort in other.cohorts.items():
+            cohort = self.cohorts.get(cohort_id)
+            if cohort is None:
+                self.cohorts[cohort_id] = other_cohort
+                continue
+
+            if cohort['min_week_id'] > other_cohort['min_week_id']:
+                cohort['min_week_id'] = other_cohort['min_week_id']
+            if cohort['max_week_id'] < other_cohort['max_week_id']:
+                cohort['max_week_id'] = other_cohort['max_week_id']
+
+            weeks = cohort['weeks']
+            for week_id, other_week_counter in other_cohort['weeks'].items():
+                week_counter = weeks.get(week_id)
+                if week_counter is None:
+                    weeks[week_id] = other_week_counter
+                else:
+                    week_counter['user_id_set'] |= other_week_counter['user_id_set']
+
     def post_processing(self) -> None:
         """
         Some statistics cannot be calculated in the streaming, one-by-one, way, and can be calculated only after all
@@ -182,10 +215,92 @@ class CohortStatisticsAggregator:
         """
         Creates a new `CohortStatistics` object, and aggregates statistics with orders file.
 
+        Orders are read in batches of parallel integer columns, and aggregated by the fused
+        `_aggregate_batch` loop. The result is the same as of `aggregate_order_by_order`.
+
+        :return: Newly created and aggregated statistics object.
+        """
+
+        statistics = self.collect()
+
+        # After all done, calculate statistics that need access to all data points.
+        statistics.post_processing()
+
+        return statistics
+
+    def collect(self) -> CohortStatistics:
+        """
+        Creates a new `CohortStatistics` object, and aggregates orders into it, without post processing.
+
+        Used for aggregating parts of orders, to be merged with `CohortStatistics.merge` and post-processed later.
+
+        :return: Newly created statistics object, not post-processed.
+        """
+
+        statistics = CohortStatistics()
+        for user_ids, __, week_ids in self.orders_reader.order_batches():
+            self._aggregate_batch(statistics, user_ids, week_ids)
+
+        return statistics
+
+    def _aggregate_batch(self, statistics: CohortStatistics, user_ids: Sequence[int], week_ids: Sequence[int]) -> None:
+        """
+        The fused aggregation loop: the same steps as `aggregate_order_by_order` and `CohortStatistics.add_order`
+        do for a single order, but in one tight loop over the batch columns, without creating an object per row
+        and with all lookups bound to local variables. Cohort IDs of the whole batch are looked up at once.
+
+        :param statistics: Statistics object to aggregate the batch into.
+        :param user_ids: Batch column with orders user IDs.
+        :param week_ids: Batch column with orders week IDs.
+        """
+
+        cohort_ids = self.customer_to_cohort_index.try_get_cohort_ids(user_ids)
+        config_max_weeks_range = self.config_max_weeks_range
+        cohorts = statistics.cohorts
+        max_weeks_range = statistics.max_weeks_range
+
+        for user_id, week_id, cohort_id in zip(user_ids, week_ids, cohort_ids):
+            if cohort_id == customer_cohort_index.NOT_FOUND_COHORT_ID:
+                continue
+
+            weeks_range = week_id - cohort_id
+            if weeks_range < 0:
+                continue
+
+            # Skip if out of configured weeks range.
+            if config_max_weeks_range is not None and weeks_range >= config_max_weeks_range:
+                continue
+
+            if weeks_range > max_weeks_range:
+                max_weeks_range = weeks_range
+
+            cohort = cohorts.get(cohort_id)
+            if cohort is None:
+                cohort = cohorts[cohort_id] = CohortStatistics.default_cohort_counter()
+
+            weeks = cohort['weeks']
+            week_counter = weeks.get(week_id)
+            if week_counter is None:
+                week_counter = weeks[week_id] = CohortStatistics.initial_week_counter()
+
+                # Min/max week IDs can change only when a new week is added.
+                if cohort['min_week_id'] is None or cohort['min_week_id'] > week_id:
+                    cohort['min_week_id'] = week_id
+                if cohort['max_week_id'] is None or cohort['max_week_id'] < week_id:
+                    cohort['max_week_id'] = week_id
+
+            week_counter['user_id_set'].add(user_id)
+
+        statistics.max_weeks_range = max_weeks_range
+
+    def aggregate_order_by_order(self) -> CohortStatistics:
+        """
+        Creates a new `CohortStatistics` object, and aggregates statistics with orders file, one order object at a time.
+
         The steps are:
             1. Reads and parses order csv file row.
             2. Looks up cohort ID by the customer ID using Customer-Cohort index. If not found, skip order.
-            3. Calculate `week_id` by order date.
+            3. Take `week_id` the order was made in.
             3. Checks if outside of cohort ID or configured max weeks, then skip.
             4. Invoke `add_order` to aggregate it to statistics.
             5. After all orders processed, invoke `post_processing`.
@@ -198,8 +313,8 @@ class CohortStatisticsAggregator:
             if cohort_id is None:
                 continue
 
-            # Calculate week ID.
-            week_id = calculate_week_id(order.created.date())
+            # Week ID is calculated by the orders reader.
+            week_id = order.week_id
 
             if week_id < cohort_id:
                 continue
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import mmap
+import re
+from operator import itemgetter
+from typing import BinaryIO, Iterator, List, Sequence, Tuple, Pattern
+
+
+class MappedCsvScanner:
+    """
+    Byte-level alternative to the `csv.reader` for memory-mapped input files.
+
+    `csv.reader` decodes every byte of the file into `str` and splits every row into a list of strings, even though
+    readers use only two columns. This scanner finds newline and comma offsets directly in the mapped bytes, and
+    slices out only the projected fields. The readers parse integers and timestamps straight out of the `bytes`.
+
+    The scanner supports plain CSV files only: fields must not be quoted and must not contain commas or newlines.
+    It is true for all columns of customers and orders files.
+
+    The iterator protocol returns the next row as a list of strings, same as the `csv.reader`. Readers use it to
+    read the header row.
+    """
+
+    # Size of newline-aligned chunks the file is scanned in.
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, csv_file: BinaryIO, start: int = 0, end: int = None) -> None:
+        """
+        :param csv_file: File open in binary mode.
+        :param start: Offset of the first row to scan.
+        :param end: Offset where scanning stops. End of the file if not set.
+        """
+
+        self.csv_file = csv_file
+
+        # Empty files cannot be mapped.
+        self.buffer = mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) \
+            if csv_file.seek(0, 2) > 0 else b""
+
+        self.position = start
+        self.end = len(self.buffer) if end is None else end
+
+    def set_range(self, start: int, end: int) -> None:
+        """
+        Restrict scanning to the rows within the byte range. Used to scan parts of the file in parallel.
+
+        :param start: Offset of the first row to scan.
+        :param end: Offset where scanning stops.
+        """
+
+        self.position = start
+        self.end = end
+
+    def split_ranges(self, count: int) -> List[Tuple[int, int]]:
+        """
+        Split the rest of the file into newline-aligned byte ranges of about the same size.
+
+        :param count: Number of ranges to split into.
+        :return: List of (start, end) offsets. Fewer than `count` ranges if there are not enough rows.
+        """
+
+        ranges = []
+        start = self.position
+        for index in range(1, count + 1):
+            if start >= self.end:
+                break
+
+            if index == count:
+                end = self.end
+            else:
+                end = self.buffer.find(b"\n", max(start, self.position + (self.end - self.position) * index // count),
+                                       self.end)
+                end = self.end if end == -1 else end + 1
+
+            ranges.append((start, end))
+            start = end
+
+        return ranges
+
+    @classmethod
+    def open(cls, file_path: str) -> MappedCsvScanner:
+        """
+        :param file_path: Path to CSV file.
+        :return: Scanner that owns the open file, to be used in the `with` statement.
+        """
+
+        return cls(open(file_path, "rb"))
+
+    def __enter__(self) -> MappedCsvScanner:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+        self.csv_file.close()
+
+    def _line_end(self, position: int) -> int:
+        """
+        :return: Offset of the newline that ends the line starting at `position`, or the scanning end.
+        """
+
+        line_end = self.buffer.find(b"\n", position, self.end)
+        return self.end if line_end == -1 else line_end
+
+    def __iter__(self) -> MappedCsvScanner:
+        return self
+
+    def __next__(self) -> List[str]:
+        """
+        :return: The next row, decoded and split into fields.
+        """
+
+        if self.position >= self.end:
+            raise StopIteration
+
+        line_end = self._line_end(self.position)
+        line = self.buffer[self.position:line_end]
+        self.position = line_end + 1
+        return line.decode().rstrip("\r").split(",")
+
+    @staticmethod
+    def _projection_pattern(columns_count: int, columns: Sequence[int]) -> Pattern:
+        """
+        Compile the pattern that matches a whole row and captures only the projected fields.
+
+        The `re` engine scans newline and comma offsets in C, over the whole chunk at once, and slices out only
+        the captured fields. Skipped fields are never copied.
+
+        :param columns_count: Number of columns in a row.
+        :param columns: Indexes of the fields to capture.
+        :return: Compiled multiline pattern.
+        """
+
+        fields = []
+        for column in range(columns_count):
+            field = rb"[^,\r\n]*" if column == columns_count - 1 else rb"[^,\n]*"
+            fields.append(b"(" + field + b")" if column in columns else field)
+        return re.compile(b"^" + b",".join(fields) + rb"\r?$", re.MULTILINE)
+
+    def _check_chunk_rows(self, chunk: bytes, pattern: Pattern) -> None:
+        """
+        The slow path when the number of matched rows differs from the number of lines in the chunk.
+
+        Empty lines are skipped, the same way the `csv.reader` does. Any other line that does not match
+        the pattern has a different number of columns.
+
+        :raise ValueError: If a malformed row is found.
+        """
+
+        for line in chunk.split(b"\n"):
+            if line.strip(b"\r") and pattern.fullmatch(line) is None:
+                raise ValueError(f"Malformed CSV row: {line.decode(errors='replace')}")
+
+    def project_columns(self, columns: Sequence[int]) -> Iterator[Tuple[bytes, ...]]:
+        """
+        Scan the rest of the file and yield only the projected fields of each row.
+
+        The file is scanned in newline-aligned chunks of `CHUNK_SIZE` bytes.
+
+        :param columns: Indexes of the fields to yield, in the order to yield them.
+        :return: Projected fields of the next row, as `bytes`.
+        """
+
+        buffer = self.buffer
+        end = self.end
+        if self.position >= end:
+            return
+
+        # Columns count is taken from the first line, rows are expected to have the same number of columns.
+        columns_count = buffer[self.position:self._line_end(self.position)].count(b",") + 1
+        pattern = self._projection_pattern(columns_count, columns)
+
+        # Captured groups come in the order of columns in the row.
+        sorted_columns = sorted(columns)
+        reorder = itemgetter(*[sorted_columns.index(column) for column in columns]) \
+            if sorted_columns != list(columns) else None
+
+        while self.position < end:
+            chunk_end = buffer.rfind(b"\n", self.position, min(self.position + self.CHUNK_SIZE, end))
+            if chunk_end == -1 or self.position + self.CHUNK_SIZE >= end:
+                chunk_end = end
+            chunk = buffer[self.position:chunk_end]
+            self.position = chunk_end + 1
+
+            rows = pattern.findall(chunk)
+            if len(rows) != chunk.count(b"\n") + 1:
+                self._check_chunk_rows(chunk, pattern)
+
+            if reorder is None:
+                yield from rows
+            else:
+                yield from map(reorder, rows)
+
+
+def project_columns(csv_reader: Iterator[Sequence], columns: Sequence[int]) -> Iterator[Tuple]:
+    """
+    Yield only the projected fields of each row, whatever the CSV reader is.
+
+    :param csv_reader: `csv.reader` or `MappedCsvScanner`.
+    :param columns: Indexes of the fields to yield, in the order to yield them.
+    :return: Projected fields of the next row.
+    """
+
+    if isinstance(csv_reader, MappedCsvScanner):
+        return csv_reader.project_columns(columns)
+    return map(itemgetter(*columns), csv_reader)
@@ -1,34 +1,189 @@
 from __future__ import annotations
 
-from typing import Dict, List
-from bisect import bisect
+import heapq
+from array import array
+from typing import Dict, Iterator, List, Sequence, Tuple
+from bisect import bisect, bisect_left
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, batch lookups fall back to pure Python.
+    numpy = None
 
 import src.cohort_customer_segment_tree as cohort_customer_segment_tree
 
+# Cohort ID returned by batch lookups for unknown customer IDs.
+NOT_FOUND_COHORT_ID = -1
+
+# Flat segments of all cohorts: segment starts, segment ends, and cohort IDs, sorted by the segment start.
+FlatSegments = Tuple[Sequence[int], Sequence[int], Sequence[int]]
+
 
 class CustomerSegmentsCohortIndex:
     """
     Index that maps customer ID to cohort ID.
 
     Built out of the Cohort Customer Segment Tree by taking root nodes and sorting them to serve as lookup list.
+
+    Flattened segments of all cohorts are merged into one sorted structure of arrays: segment starts, segment ends and
+    cohort IDs. Cohort ID ranges can interleave, but segments of different cohorts are disjunct, so a lookup is one
+    `bisect` over segment starts, `O(logS)` where S is the total number of segments.
     """
 
+    LOOKUP_STRATEGY = "segments"
+
     def __init__(self, cohort_index: List[cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNode],
                  cohorts: Dict[
-                     int, cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo]):
+                     int, cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo],
+                 segments: FlatSegments = None):
         """
-        :param cohort_index: List of sorted cohort segment root nodes.
+        :param cohort_index: List of sorted cohort segment root nodes, or `None` when `segments` are given.
         :param cohorts: Original tree, but flattened and prepared for lookup by cohort ID. Used by `ReportGenerator` to
             gather cohort info.
+        :param segments: Already merged flat segments of all cohorts (loaded index file), or `None` to merge them out
+            of `cohort_index`.
         """
 
         self.cohort_index = cohort_index
         self.cohorts = cohorts
 
+        # Segments of all cohorts, sorted by the segment start.
+        if segments is not None:
+            self.segment_starts, self.segment_ends, self.segment_cohort_ids = segments
+        else:
+            self.segment_starts = array('q')
+            self.segment_ends = array('q')
+            self.segment_cohort_ids = array('q')
+            for start, end, cohort_id in heapq.merge(*[self._cohort_segments(cohort) for cohort in cohort_index]):
+                self.segment_starts.append(start)
+                self.segment_ends.append(end)
+                self.segment_cohort_ids.append(cohort_id)
+
+        # Customer IDs out of these bounds are rejected without a lookup.
+        self.min_customer_id = self.segment_starts[0] if self.segment_starts else 0
+        self.max_customer_id = self.segment_ends[-1] if self.segment_ends else -1
+
+    def __getstate__(self) -> dict:
+        """
+        Segments loaded from the index file are memory-mapped views, and are copied into arrays to be pickled
+        (sent to worker processes).
+        """
+
+        state = dict(self.__dict__)
+        for name in ("segment_starts", "segment_ends", "segment_cohort_ids"):
+            if isinstance(state[name], memoryview):
+                state[name] = array('q', state[name])
+        return state
+
+    @staticmethod
+    def _cohort_segments(cohort: cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo) \
+            -> Iterator[Tuple[int, int, int]]:
+        """
+        :param cohort: Cohort segments tree, flattened if not yet.
+        :return: Ascending `(start, end, cohort_id)` segments of the cohort.
+        """
+
+        if cohort.segments is None:
+            cohort.flatten()
+        return ((start, end, cohort.cohort_id) for start, end in cohort.segments)
+
+    def customer_ids_range(self) -> int:
+        """
+        :return: Number of customer IDs between the minimum and the maximum customer ID, inclusive.
+        """
+
+        return self.max_customer_id - self.min_customer_id + 1
+
+    def unique_customers_count(self) -> int:
+        """
+        :return: Number of customer IDs in all segments.
+        """
+
+        return sum(self.segment_ends) - sum(self.segment_starts) + len(self.segment_starts)
+
     def try_get_cohort_id_by_customer_id(self, customer_id: int) -> int:
+        """
+        Lookup cohort ID by customer ID in the sorted segments of all cohorts.
+
+        :param customer_id: Customer ID to find the cohort ID it belongs.
+        :return: cohort ID if found, otherwise `None`
+        """
+
+        if customer_id < self.min_customer_id or customer_id > self.max_customer_id:
+            return None
+
+        # Find the last segment that starts before or at `customer_id`.
+        index = bisect(self.segment_starts, customer_id) - 1
+        if self.segment_ends[index] >= customer_id:
+            return self.segment_cohort_ids[index]
+        return None
+
+    def try_get_cohort_ids(self, customer_ids: Sequence[int]) -> array:
+        """
+        Lookup cohort IDs for a batch of customer IDs at once.
+
+        With `numpy` installed, all customer IDs are searched in segment starts with one `numpy.searchsorted` call.
+        Otherwise, customer IDs are sorted, and walked together with sorted segments in one merge pass. The walk skips
+        segments between two customer IDs with `bisect` from the current segment, so a batch does not cost `O(S)`
+        when there are many more segments than customer IDs.
+
+        :param customer_ids: Customer IDs to find the cohort IDs they belong.
+        :return: Cohort IDs as `array('q')`, in the order of `customer_ids`, `NOT_FOUND_COHORT_ID` for unknown IDs.
+        """
+
+        if numpy is not None:
+            return self._try_get_cohort_ids_numpy(customer_ids)
+
+        segment_starts = self.segment_starts
+        segment_ends = self.segment_ends
+        segment_cohort_ids = self.segment_cohort_ids
+        segments_count = len(segment_starts)
+
+        cohort_ids = array('q', [NOT_FOUND_COHORT_ID]) * len(customer_ids)
+        if segments_count == 0:
+            return cohort_ids
+
+        segment = 0
+        for position in sorted(range(len(customer_ids)), key=customer_ids.__getitem__):
+            customer_id = customer_ids[position]
+            if segment_ends[segment] < customer_id:
+                # The first segment that ends at or after `customer_id`.
+                segment = bisect_left(segment_ends, customer_id, segment + 1)
+                if segment == segments_count:
+                    break
+            if segment_starts[segment] <= customer_id:
+                cohort_ids[position] = segment_cohort_ids[segment]
+
+        return cohort_ids
+
+    def _try_get_cohort_ids_numpy(self, customer_ids: Sequence[int]) -> array:
+        """
+        `try_get_cohort_ids` with `numpy`.
+        """
+
+        customer_ids = numpy.asarray(customer_ids, dtype=numpy.int64)
+        if len(self.segment_starts) == 0:
+            return array('q', [NOT_FOUND_COHORT_ID]) * len(customer_ids)
+
+        segment_starts = numpy.frombuffer(self.segment_starts, dtype=numpy.int64)
+        segment_ends = numpy.frombuffer(self.segment_ends, dtype=numpy.int64)
+        segment_cohort_ids = numpy.frombuffer(self.segment_cohort_ids, dtype=numpy.int64)
+
+        segments = numpy.searchsorted(segment_starts, customer_ids, side="right") - 1
+        found = segments >= 0
+        segments[~found] = 0
+        found &= segment_ends[segments] >= customer_ids
+
+        cohort_ids = numpy.where(found, segment_cohort_ids[segments], NOT_FOUND_COHORT_ID).astype(numpy.int64)
+        return array('q', cohort_ids.tobytes())
+
+    def try_get_cohort_id_by_cohort_trees(self, customer_id: int) -> int:
         """
         Lookup cohort ID by customer ID in the sorted list of cohort Tree nodes.
 
+        The original lookup, kept for comparison in benchmarks. It walks every cohort with the ID range that includes
+        `customer_id`, so it degrades to `O(K)` lookups in cohort trees when cohort ID ranges interleave.
+
         :param customer_id: Customer ID to find the cohort ID it belongs.
         :return: cohort ID if found, otherwise `None`
         """
@@ -50,35 +205,183 @@ class CustomerSegmentsCohortIndex:
         return None
 
 
+class CustomerDenseCohortIndex(CustomerSegmentsCohortIndex):
+    """
+    Index that maps customer ID to cohort ID with a direct-address table.
+
+    Customer IDs are mostly auto-increment integers in a compact range. The table has an item per customer ID in
+    the range, indexed by `customer_id - min_customer_id`, so a lookup is one array access. The item is the slot of
+    the cohort in `slot_cohort_ids`, and slot `0` stands for an unknown customer ID.
+
+    Items are `array('H')` for up to 65535 cohorts, otherwise `array('I')`.
+    """
+
+    LOOKUP_STRATEGY = "dense"
+
+    def __init__(self, cohort_index: List[cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNode],
+                 cohorts: Dict[
+                     int, cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo],
+                 segments: FlatSegments = None):
+        """
+        :param cohort_index: List of sorted cohort segment root nodes, or `None` when `segments` are given.
+        :param cohorts: Original tree, but flattened and prepared for lookup by cohort ID. Used by `ReportGenerator` to
+            gather cohort info.
+        :param segments: Already merged flat segments of all cohorts, or `None` to merge them out of `cohort_index`.
+        """
+
+        super().__init__(cohort_index, cohorts, segments)
+
+        # Cohort IDs by slot, the slot 0 is for unknown customer IDs.
+        self.slot_cohort_ids: List[int] = [None] + sorted(cohorts.keys())
+        # The same for batch lookups, with `NOT_FOUND_COHORT_ID` in the slot 0.
+        self.dense_slot_cohort_ids: List[int] = [NOT_FOUND_COHORT_ID] + self.slot_cohort_ids[1:]
+        slots = {cohort_id: slot for slot, cohort_id in enumerate(self.slot_cohort_ids) if slot > 0}
+
+        self.table = array(dense_table_typecode(len(cohorts)),
+                           bytes(dense_table_item_size(len(cohorts)) * self.customer_ids_range()))
+        min_customer_id = self.min_customer_id
+        for start, end, cohort_id in zip(self.segment_starts, self.segment_ends, self.segment_cohort_ids):
+            self.table[start - min_customer_id:end - min_customer_id + 1] = \
+                array(self.table.typecode, [slots[cohort_id]]) * (end - start + 1)
+
+    def try_get_cohort_id_by_customer_id(self, customer_id: int) -> int:
+        """
+        Lookup cohort ID by customer ID in the direct-address table.
+
+        :param customer_id: Customer ID to find the cohort ID it belongs.
+        :return: cohort ID if found, otherwise `None`
+        """
+
+        if customer_id < self.min_customer_id or customer_id > self.max_customer_id:
+            return None
+        return self.slot_cohort_ids[self.table[customer_id - self.min_customer_id]]
+
+
+    def try_get_cohort_ids(self, customer_ids: Sequence[int]) -> array:
+        """
+        Lookup cohort IDs for a batch of customer IDs at once in the direct-address table.
+
+        :param customer_ids: Customer IDs to find the cohort IDs they belong.
+        :return: Cohort IDs as `array('q')`, in the order of `customer_ids`, `NOT_FOUND_COHORT_ID` for unknown IDs.
+        """
+
+        if numpy is not None:
+            return self._try_get_cohort_ids_numpy(customer_ids)
+
+        table = self.table
+        min_customer_id = self.min_customer_id
+        max_customer_id = self.max_customer_id
+        slot_cohort_ids = self.dense_slot_cohort_ids
+
+        return array('q', [slot_cohort_ids[table[customer_id - min_customer_id]]
+                           if min_customer_id <= customer_id <= max_customer_id else NOT_FOUND_COHORT_ID
+                           for customer_id in customer_ids])
+
+    def _try_get_cohort_ids_numpy(self, customer_ids: Sequence[int]) -> array:
+        """
+        `try_get_cohort_ids` with `numpy`.
+        """
+
+        customer_ids = numpy.asarray(customer_ids, dtype=numpy.int64)
+        positions = customer_ids - self.min_customer_id
+        in_range = (positions >= 0) & (positions < len(self.table))
+        positions[~in_range] = 0
+
+        table = numpy.frombuffer(self.table, dtype=numpy.uint16 if self.table.typecode == "H" else numpy.uint32)
+        slots = numpy.where(in_range, table[positions] if len(table) > 0 else 0, 0)
+
+        slot_cohort_ids = numpy.array(self.dense_slot_cohort_ids, dtype=numpy.int64)
+        return array('q', slot_cohort_ids[slots].tobytes())
+
+
+def dense_table_typecode(cohorts_count: int) -> str:
+    """
+    :param cohorts_count: Number of cohorts, slots are 1 to `cohorts_count`.
+    :return: The smallest `array` typecode for the dense table items.
+    """
+
+    return "H" if cohorts_count < 1 << 16 else "I"
+
+
+def dense_table_item_size(cohorts_count: int) -> int:
+    """
+    :param cohorts_count: Number of cohorts.
+    :return: Size of the dense table item in bytes.
+    """
+
+    return array(dense_table_typecode(cohorts_count)).itemsize
+
+
 class CustomerIndexBuilder:
     """
     Customer Index factory.
 
-    Takes dictionary with cohort segments tree, and constructs the `CustomerSegmentsCohortIndex`.
+    Takes dictionary with cohort segments tree, and constructs the `CustomerSegmentsCohortIndex`, or
+    the `CustomerDenseCohortIndex` when customer IDs are dense enough, and the dense table fits the memory cap.
     """
 
+    # Minimum share of known customer IDs in the customer IDs range to build the dense table.
+    DENSE_MIN_DENSITY = 0.5
+
+    # Maximum size of the dense table in bytes.
+    DENSE_MAX_BYTES = 64 << 20
+
     def __init__(self,
                  cohorts:
                  Dict[
-                     int, cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo]) \
-            -> None:
+                     int, cohort_customer_segment_tree.CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo],
+                 dense_min_density: float = DENSE_MIN_DENSITY, dense_max_bytes: int = DENSE_MAX_BYTES,
+                 segments: FlatSegments = None) -> None:
         """
         :param cohorts: The dictionary cohort segment tree. Keys are cohort IDs.  
+        :param dense_min_density: Minimum share of known customer IDs in the range to build the dense table.
+        :param dense_max_bytes: Maximum size of the dense table in bytes.
+        :param segments: Flat segments of all cohorts loaded from the index file. Then `cohorts` are cohort infos
+            with unique customer counts, instead of segment trees.
         """
 
         self.cohorts = cohorts
+        self.segments = segments
+        self.dense_min_density = dense_min_density
+        self.dense_max_bytes = dense_max_bytes
         self.customer_index = None
 
     def build(self) -> CustomerSegmentsCohortIndex:
         """
         Sorts the cohort segment trees by the segment start and creates sorted lookup cohort list as index.
 
+        The segment index is built first, and replaced with the dense index when the customer IDs range is dense
+        enough, and the dense table fits the memory cap.
+
         The time complexity is `O(NlogN), whene N is number of cohorts. Low and stable number.
-        :return: Created `CustomerSegmentsCohortIndex`.
+        The dense table takes `O(R)` more, where R is the customer IDs range.
+        :return: Created `CustomerSegmentsCohortIndex` or `CustomerDenseCohortIndex`.
         """
 
-        cohort_index = list(self.cohorts.values())
-        cohort_index.sort()
+        if self.segments is None:
+            cohort_index = list(self.cohorts.values())
+            cohort_index.sort()
+        else:
+            cohort_index = None
 
-        self.customer_index = CustomerSegmentsCohortIndex(cohort_index, self.cohorts)
+        self.customer_index = CustomerSegmentsCohortIndex(cohort_index, self.cohorts, self.segments)
+        if self._use_dense_index(self.customer_index):
+            self.customer_index = CustomerDenseCohortIndex(cohort_index, self.cohorts,
+                                                           (self.customer_index.segment_starts,
+                                                            self.customer_index.segment_ends,
+                                                            self.customer_index.segment_cohort_ids))
         return self.customer_index
+
+    def _use_dense_index(self, segment_index: CustomerSegmentsCohortIndex) -> bool:
+        """
+        :param segment_index: Built segment index.
+        :return: `True` if the dense index satisfies density and memory constraints.
+        """
+
+        customer_ids_range = segment_index.customer_ids_range()
+        if customer_ids_range <= 0:
+            return False
+
+        density = segment_index.unique_customers_count() / customer_ids_range
+        table_bytes = customer_ids_range * dense_table_item_size(len(self.cohorts))
+        return density >= self.dense_min_density and table_bytes <= self.dense_max_bytes
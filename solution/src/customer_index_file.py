@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date, tzinfo
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import src.customer_cohort_index as customer_cohort_index
+from src.cohort_customer_segment_tree import CohortInfo, CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo
+
+INDEX_FILE_MAGIC = b"COHINDEX"
+INDEX_FILE_VERSION = 1
+
+# Magic, version, timezone name length, cohorts count, and segments count.
+# 32 bytes, so the int64 sections that follow are aligned in the memory map.
+INDEX_FILE_HEADER = struct.Struct("<8sIIQQ")
+
+# Sections are int64 arrays, 8 bytes per item.
+ITEM_SIZE = 8
+
+
+class InvalidIndexFileError(ValueError):
+    """
+    The file is not a valid customer index file, or it cannot be used in this run.
+    """
+
+
+class IndexedCohortInfo(CohortInfo):
+    """
+    Cohort info loaded from the index file, with the unique customers count stored in place of the segment tree.
+    """
+
+    __slots__ = ("unique_customers_count",)
+
+    def __init__(self, cohort_id: int, cohort_week_start: date, unique_customers_count: int) -> None:
+        """
+        :param cohort_id: Cohort ID.
+        :param cohort_week_start: date when the cohort week starts.
+        :param unique_customers_count: Number of customers in the cohort.
+        """
+
+        super().__init__(cohort_id, cohort_week_start)
+        self.unique_customers_count = unique_customers_count
+
+    def get_unique_customer_count(self) -> int:
+        """
+        Same as the segment tree root node, used by the report generator.
+
+        :return: Unique customers count.
+        """
+
+        return self.unique_customers_count
+
+
+def _padded_length(length: int) -> int:
+    """
+    :return: `length` rounded up to the multiple of the section item size.
+    """
+
+    return (length + ITEM_SIZE - 1) // ITEM_SIZE * ITEM_SIZE
+
+
+def _little_endian(section: Sequence[int]) -> bytes:
+    """
+    Sections are stored little-endian, whatever the platform is.
+    """
+
+    section = array('q', section)
+    if sys.byteorder == "big":
+        section.byteswap()
+    return section.tobytes()
+
+
+def save_customer_index(file_path: str, customer_index: customer_cohort_index.CustomerSegmentsCohortIndex,
+                        timezone: tzinfo) -> None:
+    """
+    Write the customer index into the binary index file.
+
+    File layout, all numbers little-endian:
+
+    - header: magic, format version, timezone name length, cohorts count K, and segments count S,
+    - timezone name, UTF-8, padded with zeros to 8 bytes,
+    - cohort table: K cohort IDs, K cohort week start dates (proleptic Gregorian ordinals), and K unique customer
+      counts, all int64,
+    - packed segment arrays: S segment starts, S segment ends, and S segment cohort IDs, all int64.
+
+    A temporary file is renamed at the end, so readers never see a partial file.
+
+    :param file_path: Path to the index file.
+    :param customer_index: Built customer index.
+    :param timezone: Timezone customers were read in. Cohort IDs depend on it.
+    """
+
+    cohorts = [customer_index.cohorts[cohort_id] for cohort_id in sorted(customer_index.cohorts.keys())]
+    timezone_name = str(timezone).encode()
+
+    temporary_path = file_path + ".tmp"
+    with open(temporary_path, "wb") as index_file:
+        index_file.write(INDEX_FILE_HEADER.pack(INDEX_FILE_MAGIC, INDEX_FILE_VERSION, len(timezone_name),
+                                                len(cohorts), len(customer_index.segment_starts)))
+        index_file.write(timezone_name.ljust(_padded_length(len(timezone_name)), b"\0"))
+        index_file.write(_little_endian([cohort.cohort_id for cohort in cohorts]))
+        index_file.write(_little_endian([cohort.cohort_week_start.toordinal() for cohort in cohorts]))
+        index_file.write(_little_endian([cohort.get_unique_customer_count() for cohort in cohorts]))
+        index_file.write(_little_endian(customer_index.segment_starts))
+        index_file.write(_little_endian(customer_index.segment_ends))
+        index_file.write(_little_endian(customer_index.segment_cohort_ids))
+    os.replace(temporary_path, file_path)
+
+
+def load_customer_index(file_path: str, timezone: tzinfo) -> Tuple[Dict[int, IndexedCohortInfo],
+                                                                   customer_cohort_index.FlatSegments]:
+    """
+    Memory-map the index file.
+
+    Segment arrays are not read, nor copied: they are `memoryview`s of the memory map, and pages are read in by
+    lookups on demand. The map stays open as long as the views are referenced. On big-endian platforms the sections
+    are copied and byte-swapped.
+
+    :param file_path: Path to the index file.
+    :param timezone: Timezone orders are read in, must be the same as the index was built in.
+    :return: Cohorts by cohort ID, and flat segments of all cohorts, passed to `CustomerIndexBuilder`.
+    :raises InvalidIndexFileError: The file is not a valid index file, or it was built in another timezone.
+    """
+
+    with open(file_path, "rb") as index_file:
+        file_size = os.fstat(index_file.fileno()).st_size
+        if file_size < INDEX_FILE_HEADER.size:
+            raise InvalidIndexFileError(f"Not a customer index file: '{file_path}'")
+        mapped_file = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, timezone_name_length, cohorts_count, segments_count = \
+        INDEX_FILE_HEADER.unpack_from(mapped_file)
+    if magic != INDEX_FILE_MAGIC:
+        raise InvalidIndexFileError(f"Not a customer index file: '{file_path}'")
+    if version != INDEX_FILE_VERSION:
+        raise InvalidIndexFileError(f"Unsupported customer index file version {version}: '{file_path}'")
+
+    offset = INDEX_FILE_HEADER.size
+    timezone_name = mapped_file[offset:offset + timezone_name_length].decode()
+    offset += _padded_length(timezone_name_length)
+    if offset + (cohorts_count * 3 + segments_count * 3) * ITEM_SIZE != file_size:
+        raise InvalidIndexFileError(f"Truncated customer index file: '{file_path}'")
+    if timezone_name != str(timezone):
+        raise InvalidIndexFileError(
+            f"Customer index file was built in the timezone '{timezone_name}': '{file_path}'")
+
+    view = memoryview(mapped_file)
+
+    def section(items_count: int) -> Sequence[int]:
+        nonlocal offset
+        items = view[offset:offset + items_count * ITEM_SIZE].cast('q')
+        offset += items_count * ITEM_SIZE
+        if sys.byteorder == "big":
+            items = array('q', items.tobytes())
+            items.byteswap()
+        return items
+
+    cohort_ids = section(cohorts_count)
+    cohort_week_starts = section(cohorts_count)
+    unique_customer_counts = section(cohorts_count)
+    segments = section(segments_count), section(segments_count), section(segments_count)
+
+    cohorts = {cohort_id: IndexedCohortInfo(cohort_id, date.fromordinal(week_start), unique_customers_count)
+               for cohort_id, week_start, unique_customers_count in
+               zip(cohort_ids, cohort_week_starts, unique_customer_counts)}
+    return cohorts, segments
+
+
+def _coalesce_segments(segments: Iterator[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    :param segments: Segments sorted by the segment start, they can overlap or be adjacent.
+    :return: Disjunct, not adjacent, sorted segments with the same customer IDs.
+    """
+
+    coalesced_segments = []
+    for start, end in segments:
+        if coalesced_segments and start <= coalesced_segments[-1][1] + 1:
+            if end > coalesced_segments[-1][1]:
+                coalesced_segments[-1] = (coalesced_segments[-1][0], end)
+        else:
+            coalesced_segments.append((start, end))
+    return coalesced_segments
+
+
+def append_cohorts(cohorts: Dict[int, CohortInfo], segments: customer_cohort_index.FlatSegments,
+                   appended_cohorts: Dict[int, CohortCustomerSegmentsTreeBuilderRootNodeWithCohortInfo]) \
+        -> Tuple[Dict[int, IndexedCohortInfo], customer_cohort_index.FlatSegments]:
+    """
+    Append new customers into the loaded index.
+
+    Only new customers are read into `appended_cohorts` trees, and only their cohorts are flattened. Segments of
+    a changed cohort are the union of its loaded segments and the new tree segments, so customers already in the
+    index are counted once. Segments of unchanged cohorts are copied as they are, in one merge pass over the flat
+    segments, without building their trees.
+
+    :param cohorts: Loaded cohorts by cohort ID.
+    :param segments: Loaded flat segments of all cohorts.
+    :param appended_cohorts: Cohort trees of new customers only, by cohort ID.
+    :return: Cohorts by cohort ID, and flat segments of all cohorts, as if all customers were read from scratch.
+    """
+
+    segment_starts, segment_ends, segment_cohort_ids = segments
+
+    # Loaded segments of changed cohorts, to be merged with new segments.
+    loaded_cohort_segments: Dict[int, List[Tuple[int, int]]] = {cohort_id: [] for cohort_id in appended_cohorts}
+    unchanged_segments = []
+    for start, end, cohort_id in zip(segment_starts, segment_ends, segment_cohort_ids):
+        cohort_segments = loaded_cohort_segments.get(cohort_id)
+        if cohort_segments is None:
+            unchanged_segments.append((start, end, cohort_id))
+        else:
+            cohort_segments.append((start, end))
+
+    merged_cohorts = dict(cohorts)
+    changed_segments = []
+    for cohort_id, appended_cohort in appended_cohorts.items():
+        if appended_cohort.segments is None:
+            appended_cohort.flatten()
+        cohort_segments = _coalesce_segments(heapq.merge(loaded_cohort_segments[cohort_id], appended_cohort.segments))
+        merged_cohorts[cohort_id] = IndexedCohortInfo(cohort_id, appended_cohort.cohort_week_start,
+                                                      sum(end - start + 1 for start, end in cohort_segments))
+        changed_segments.append([(start, end, cohort_id) for start, end in cohort_segments])
+
+    merged_segments = array('q'), array('q'), array('q')
+    for start, end, cohort_id in heapq.merge(unchanged_segments, *changed_segments):
+        merged_segments[0].append(start)
+        merged_segments[1].append(end)
+        merged_segments[2].append(cohort_id)
+    return merged_cohorts, merged_segments
@@ -1,7 +1,9 @@
 import collections.abc as collections
+from typing import Iterator
 from datetime import datetime, tzinfo
 
-from src.utils import parse_utc_datetime_with_timezone
+from src.parsed_input_cache import read_columns_batches
+from src.utils import calculate_week_id, locate_column, ColumnsBatch, DEFAULT_BATCH_SIZE
 
 
 class Customer:
@@ -9,25 +11,55 @@ class Customer:
     Customer value object.
     """
 
-    def __init__(self, customer_id: int, created: datetime) -> None:
+    __slots__ = ("customer_id", "_created", "timestamp", "timezone", "week_id")
+
+    def __init__(self, customer_id: int, created: datetime = None, week_id: int = None, timestamp: int = None,
+                 timezone: tzinfo = None) -> None:
         """
+        Customers read from CSV files are created out of `timestamp` and `week_id`, and `created` is materialized
+        only when accessed.
+
         :param customer_id:
         :param created: Date when customer joined the system.
+        :param week_id: The week customer joined the system. Calculated from `created` if not set.
+        :param timestamp: Epoch seconds when customer joined the system, used when `created` is not set.
+        :param timezone: Timezone to materialize `created` in out of `timestamp`.
         """
 
         self.customer_id = customer_id
-        self.created = created
+        self._created = created
+        self.timestamp = timestamp
+        self.timezone = timezone
+        self.week_id = calculate_week_id(created.date()) if week_id is None else week_id
+
+    @property
+    def created(self) -> datetime:
+        if self._created is None:
+            self._created = datetime.fromtimestamp(self.timestamp, self.timezone)
+        return self._created
 
 
 class CustomersReader:
     """
     Wrapper around the csv reader to read and parse customers row by row.
+
+    The csv reader can be `csv.reader`, `MappedCsvScanner`, or parsed input cache `ParsedColumns`.
+    Only the ID and created columns are parsed. They are located by name in the header row, and
+    the column constants are used when the header row does not name them.
     """
 
+    CUSTOMER_ID_COLUMN_NAME = "id"
+    CREATED_COLUMN_NAME = "created"
+    CUSTOMER_ID_COLUMN = 0
+    CREATED_COLUMN = 1
+
     def __init__(self, customers_csv_reader: collections.Iterator, customers_timezone: tzinfo) -> None:
         self.customers_csv_reader = customers_csv_reader
         self.timezone = customers_timezone
         self.header_row = next(customers_csv_reader)
+        self.customer_id_column = locate_column(self.header_row, self.CUSTOMER_ID_COLUMN_NAME,
+                                                self.CUSTOMER_ID_COLUMN)
+        self.created_column = locate_column(self.header_row, self.CREATED_COLUMN_NAME, self.CREATED_COLUMN)
 
     def customers(self) -> Customer:
         """
@@ -35,7 +67,18 @@ class CustomersReader:
 
         :return: Read and parsed customer from the next row.
         """
-        for row in self.customers_csv_reader:
-            yield Customer(int(row[0]), parse_utc_datetime_with_timezone(row[1], self.timezone))
 
+        for ids, timestamps, week_ids in self.customer_batches():
+            for row_id, timestamp, week_id in zip(ids, timestamps, week_ids):
+                yield Customer(row_id, week_id=week_id, timestamp=timestamp, timezone=self.timezone)
+
+    def customer_batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[ColumnsBatch]:
+        """
+        Yield read and parsed customers in batches of parallel integer columns, without creating an object per row.
+
+        :param batch_size: Number of rows in a batch. The last batch can be shorter.
+        :return: Batches of customer IDs, epoch seconds and week IDs as `array('q')` columns.
+        """
 
+        return read_columns_batches(self.customers_csv_reader, (self.customer_id_column, self.created_column),
+                                    self.timezone, batch_size)
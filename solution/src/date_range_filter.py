@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date, timedelta
+from itertools import chain, compress
+from typing import Iterator, Sequence, Tuple, Union
+
+from src.utils import ColumnsBatch, EPOCH_ORDINAL, SECONDS_PER_DAY
+
+# Length of the 'YYYY-MM-DD' date prefix of ISO date/time fields.
+DATE_STR_LENGTH = 10
+
+# Bounds that let all rows pass when `since` or `until` is not set.
+MIN_DATE_STR = "0000-00-00"
+MAX_DATE_STR = "9999-99-99"
+
+
+class DateRangeFilter:
+    """
+    Filters input rows by the UTC date of the created field, inclusive on both ends.
+
+    Rows are filtered before parsing, by comparing the raw 'YYYY-MM-DD' prefix of the created field as a string.
+    ISO dates sort as strings in the same order as dates, so rows out of the range skip the date/time parsing.
+
+    Sources that are already parsed (parsed input cache) are filtered by epoch seconds to the same result.
+    """
+
+    def __init__(self, since: date = None, until: date = None) -> None:
+        """
+        :param since: The first UTC date of rows to keep, or `None` for no lower bound.
+        :param until: The last UTC date of rows to keep, or `None` for no upper bound.
+        """
+
+        self.since = since
+        self.until = until
+
+        self.since_str = since.isoformat() if since is not None else MIN_DATE_STR
+        self.until_str = until.isoformat() if until is not None else MAX_DATE_STR
+
+        # Number of rows filtered out so far.
+        self.pruned_rows_count = 0
+
+    def filter_rows(self, rows: Iterator[Sequence[Union[str, bytes]]], created_index: int = 1) \
+            -> Iterator[Sequence[Union[str, bytes]]]:
+        """
+        Yield only the rows with the created date within the range.
+
+        :param rows: Projected CSV rows, with fields as `str` or `bytes`.
+        :param created_index: Index of the created field in rows.
+        :return: Rows within the range.
+        """
+
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            return
+
+        since, until = self.since_str, self.until_str
+        if isinstance(first_row[created_index], bytes):
+            since, until = since.encode(), until.encode()
+
+        pruned_rows_count = 0
+        try:
+            for row in chain((first_row,), rows):
+                day = row[created_index][:DATE_STR_LENGTH]
+                if day < since or day > until:
+                    pruned_rows_count += 1
+                else:
+                    yield row
+        finally:
+            self.pruned_rows_count += pruned_rows_count
+
+    def timestamp_range(self) -> Tuple[int, int]:
+        """
+        :return: Epoch seconds range of the filter, the start is inclusive and the end is exclusive.
+        """
+
+        since_timestamp = (self.since.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY \
+            if self.since is not None else -(1 << 63)
+        until_timestamp = ((self.until + timedelta(days=1)).toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY \
+            if self.until is not None else (1 << 63) - 1
+        return since_timestamp, until_timestamp
+
+    def filter_batches(self, batches: Iterator[ColumnsBatch]) -> Iterator[ColumnsBatch]:
+        """
+        Filter already parsed batches by epoch seconds. Filtered batches can be shorter than the batch size.
+
+        :param batches: Batches of IDs, epoch seconds and week IDs as `array('q')` columns.
+        :return: Batches with rows within the range only.
+        """
+
+        since_timestamp, until_timestamp = self.timestamp_range()
+        for ids, timestamps, week_ids in batches:
+            selectors = [since_timestamp <= timestamp < until_timestamp for timestamp in timestamps]
+            kept_rows_count = sum(selectors)
+            self.pruned_rows_count += len(selectors) - kept_rows_count
+
+            if kept_rows_count == len(selectors):
+                yield ids, timestamps, week_ids
+            elif kept_rows_count > 0:
+                yield array('q', compress(ids, selectors)), array('q', compress(timestamps, selectors)), \
+                    array('q', compress(week_ids, selectors))
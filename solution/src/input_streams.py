@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import queue
+import sys
+import threading
+from typing import BinaryIO, Callable, ContextManager, Dict, Iterator, Optional, TextIO
+
+# Compression formats, detected by the magic bytes at the start of the file.
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_BZIP2 = "bzip2"
+COMPRESSION_XZ = "xz"
+
+COMPRESSION_MAGIC_BYTES: Dict[str, bytes] = {
+    COMPRESSION_GZIP: b"\x1f\x8b",
+    COMPRESSION_BZIP2: b"BZh",
+    COMPRESSION_XZ: b"\xfd7zXZ\x00",
+}
+
+MAGIC_BYTES_LENGTH = max(len(magic) for magic in COMPRESSION_MAGIC_BYTES.values())
+
+COMPRESSION_OPENERS: Dict[str, Callable[..., BinaryIO]] = {
+    COMPRESSION_GZIP: gzip.open,
+    COMPRESSION_BZIP2: bz2.open,
+    COMPRESSION_XZ: lzma.open,
+}
+
+# Size of reusable buffers the background thread fills for the parser.
+CHUNK_SIZE = 1 << 20
+
+# Number of reusable buffers. The background thread blocks when all buffers wait for the parser.
+BUFFERS_COUNT = 8
+
+# Seconds to wait for the background thread to stop when the stream is closed. The thread can be blocked reading
+# a pipe that has no data, and it is a daemon thread, so it does not keep the process alive.
+STOP_TIMEOUT_SECONDS = 1.0
+
+# Path that stands for the standard input.
+STDIN_PATH = "-"
+
+# Marks the end of the stream in the queue.
+_END_OF_STREAM = object()
+
+
+def is_regular_file(file_path: str) -> bool:
+    """
+    Regular files can be opened more than once, memory-mapped, split into ranges, and fingerprinted.
+    The standard input and named pipes can be read only once, from start to end.
+
+    :param file_path: Path to the input file, or `STDIN_PATH`.
+    :return: `True` if the path is a regular file.
+    """
+
+    return file_path != STDIN_PATH and os.path.isfile(file_path)
+
+
+def compression_by_magic_bytes(magic_bytes: bytes) -> Optional[str]:
+    """
+    :param magic_bytes: The first bytes of the input.
+    :return: One of `COMPRESSION_*` formats, or `None` for the uncompressed input.
+    """
+
+    for compression, magic in COMPRESSION_MAGIC_BYTES.items():
+        if magic_bytes.startswith(magic):
+            return compression
+    return None
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """
+    :param file_path: Path to the input file.
+    :return: One of `COMPRESSION_*` formats, or `None` for the uncompressed file.
+    """
+
+    with open(file_path, "rb") as input_file:
+        return compression_by_magic_bytes(input_file.read(MAGIC_BYTES_LENGTH))
+
+
+class BackgroundReadStream(io.RawIOBase):
+    """
+    Binary stream that is read ahead by a background thread.
+
+    The background thread fills a fixed set of reusable buffers from the source, and hands them over to the consumer
+    through a queue. The consumer returns each buffer once it is copied out, so memory stays bounded and the parser
+    does not wait for a slow source while filled buffers are available. Reading from files and pipes, and
+    decompressing, release the GIL, so they overlap with parsing and aggregating.
+
+    The source is read once from start to end, and never seeks. Exceptions raised by the background thread are
+    re-raised by `readinto` in the consumer thread.
+    """
+
+    def __init__(self, open_source: Callable[[], ContextManager[BinaryIO]], chunk_size: int = CHUNK_SIZE,
+                 buffers_count: int = BUFFERS_COUNT) -> None:
+        """
+        :param open_source: Opens the source stream in the background thread, the stream has to support `readinto`.
+        :param chunk_size: Size of reusable buffers.
+        :param buffers_count: Number of reusable buffers.
+        """
+
+        super().__init__()
+        self._open_source = open_source
+        self._free_buffers = queue.Queue()
+        for _ in range(buffers_count):
+            self._free_buffers.put(bytearray(chunk_size))
+        self._filled_buffers = queue.Queue()
+        self._closing = threading.Event()
+
+        # The current buffer, its filled size, and the read position within it.
+        self._buffer: Optional[bytearray] = None
+        self._buffer_view = memoryview(b"")
+        self._buffer_position = 0
+        self._end_of_stream = False
+
+        self._thread = threading.Thread(target=self._produce, name="BackgroundReadStream", daemon=True)
+        self._thread.start()
+
+    def _get_free_buffer(self) -> Optional[bytearray]:
+        """
+        Wait until the consumer returns a buffer, or closes the stream.
+
+        :return: Buffer to fill, or `None` if the stream is closed and producing should stop.
+        """
+
+        while not self._closing.is_set():
+            try:
+                return self._free_buffers.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _produce(self) -> None:
+        """
+        Background thread: fill free buffers from the source, and queue them for the consumer.
+        """
+
+        try:
+            with self._open_source() as source:
+                while True:
+                    buffer = self._get_free_buffer()
+                    if buffer is None:
+                        return
+                    size = source.readinto(buffer)
+                    if not size:
+                        break
+                    self._filled_buffers.put((buffer, size))
+        except BaseException as err:
+            self._filled_buffers.put(err)
+            return
+
+        self._filled_buffers.put(_END_OF_STREAM)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """
+        Copy the next bytes out of the current buffer, taking the next filled buffer from the queue when needed.
+
+        :param buffer: Buffer to read into.
+        :return: Number of bytes read, `0` at the end of the stream.
+        """
+
+        if self._buffer_position == len(self._buffer_view):
+            if self._end_of_stream:
+                return 0
+
+            if self._buffer is not None:
+                # The buffer is copied out, return it to the background thread.
+                self._free_buffers.put(self._buffer)
+                self._buffer = None
+
+            item = self._filled_buffers.get()
+            if item is _END_OF_STREAM:
+                self._end_of_stream = True
+                return 0
+            if isinstance(item, BaseException):
+                self._end_of_stream = True
+                raise item
+
+            self._buffer, size = item
+            self._buffer_view = memoryview(self._buffer)[:size]
+            self._buffer_position = 0
+
+        size = min(len(buffer), len(self._buffer_view) - self._buffer_position)
+        buffer[:size] = self._buffer_view[self._buffer_position:self._buffer_position + size]
+        self._buffer_position += size
+        return size
+
+    def close(self) -> None:
+        """
+        Stop the background thread, even when the stream is not read to the end.
+        """
+
+        if not self.closed:
+            self._closing.set()
+            self._thread.join(STOP_TIMEOUT_SECONDS)
+        super().close()
+
+
+def _open_stream(file_path: str) -> BinaryIO:
+    """
+    Open the standard input or a named pipe for unbuffered reading. The standard input is not closed with the stream.
+
+    :param file_path: `STDIN_PATH` or path to a named pipe.
+    :return: Raw binary stream.
+    """
+
+    if file_path == STDIN_PATH:
+        return open(sys.stdin.fileno(), "rb", buffering=0, closefd=False)
+    return open(file_path, "rb", buffering=0)
+
+
+@contextlib.contextmanager
+def _decompressing(compressed_stream: BinaryIO, compression: str) -> Iterator[BinaryIO]:
+    """
+    Decompress the stream, and close it together with the decompressing stream.
+    """
+
+    with compressed_stream, COMPRESSION_OPENERS[compression](compressed_stream) as decompressed_stream:
+        yield decompressed_stream
+
+
+def open_text_input(file_path: str) -> TextIO:
+    """
+    Open the input file for reading text.
+
+    The standard input (`STDIN_PATH`) and named pipes are read ahead by the background thread. Compressed inputs
+    (`gzip`, `bzip2` and `xz`) are detected by their content, and decompressed on another background thread while
+    the returned stream is being read. Streams are read once, and never seek.
+
+    :param file_path: Path to the input file, or `STDIN_PATH`.
+    :return: Text stream, to be closed by the caller.
+    """
+
+    if is_regular_file(file_path):
+        compression = detect_compression(file_path)
+        if compression is None:
+            return open(file_path, newline="")
+        binary_input = io.BufferedReader(BackgroundReadStream(lambda: COMPRESSION_OPENERS[compression](file_path)))
+        return io.TextIOWrapper(binary_input, newline="")
+
+    raw_stream = _open_stream(file_path)
+    binary_input = io.BufferedReader(BackgroundReadStream(lambda: raw_stream))
+
+    # Peeking does not consume the magic bytes.
+    compression = compression_by_magic_bytes(binary_input.peek(MAGIC_BYTES_LENGTH)[:MAGIC_BYTES_LENGTH])
+    if compression is not None:
+        compressed_input = binary_input
+        binary_input = io.BufferedReader(BackgroundReadStream(lambda: _decompressing(compressed_input, compression)))
+
+    return io.TextIOWrapper(binary_input, newline="")
@@ -1,7 +1,8 @@
 import argparse
 import sys
 import csv
-from datetime import tzinfo
+from contextlib import ExitStack
+from datetime import tzinfo, datetime, date
 from typing import List, Dict
 
 import src.cohort_customer_segment_tree as cohort_customer_index
@@ -10,8 +11,17 @@ import src.orders as orders
 import src.customers as customers
 import src.cohort_statistics as cohort_statistics
 import src.report_generator as report_generator
+import src.csv_scanner as csv_scanner
+import src.parallel_statistics as parallel_statistics
+import src.parsed_input_cache as parsed_input_cache
+import src.input_streams as input_streams
+import src.customer_index_file as customer_index_file
+from src.date_range_filter import DateRangeFilter
 from src.utils import parse_timezone
 
+INPUT_ENGINE_CSV = "csv"
+INPUT_ENGINE_MMAP = "mmap"
+
 
 def parse_argv(args: List[str]) -> object:
     """
@@ -28,60 +38,177 @@ def parse_argv(args: List[str]) -> object:
             raise argparse.ArgumentTypeError("Minimum allowed value is 1")
         return max_weeks
 
+    def parse_date(arg: str) -> date:
+        try:
+            return datetime.strptime(arg, "%Y-%m-%d").date()
+        except ValueError:
+            raise argparse.ArgumentTypeError("Expected format is 'YYYY-MM-DD'")
+
+    def parse_workers(arg: str) -> int:
+        workers = int(arg)
+        if workers < 1:
+            raise argparse.ArgumentTypeError("Minimum allowed value is 1")
+        return workers
+
     parser: argparse.ArgumentParser = argparse.ArgumentParser(
         description="Invitae Cohort Analysis Assignment by Vinko Buble.\n"
                     "Load two CSV files that represent customers "
                     "and orders. Calculate number of orders per weekly "
                     "cohort. Output results as CSV file."
     )
-    parser.add_argument("--customers-file", "-cf", required=True, help="Path to customers CSV file")
-    parser.add_argument("--orders-file", "-of", required=True, help="Path to orders CSV file")
+    parser.add_argument("--customers-file", "-cf",
+                        help="Path to customers CSV file, optionally compressed with gzip, bzip2 or xz. "
+                             f"A named pipe, or '{input_streams.STDIN_PATH}' for the standard input. "
+                             "Required, unless the customer index is loaded with --load-index. With --load-index, "
+                             "only new customers to append into the loaded index")
+    parser.add_argument("--orders-file", "-of", required=True,
+                        help="Path to orders CSV file, optionally compressed with gzip, bzip2 or xz. "
+                             f"A named pipe, or '{input_streams.STDIN_PATH}' for the standard input")
     parser.add_argument("--output-file", "-o", required=True, help="Path to output CSV file")
     parser.add_argument("--timezone", "-tz", required=True, type=parse_timezone,
                         help="Timezone for date fields in input and output CSV files. "
-                             "Format '[+|-]HHMM'. Example: '-0500'")
+                             "Format '[+|-]HHMM' or IANA timezone name. "
+                             "Examples: '-0500', 'America/Los_Angeles'")
     parser.add_argument("--max-weeks", "-mw", type=parse_max_weeks,
                         help="Maximum number of weeks of orders to process (max_weeks > 0)")
+    parser.add_argument("--workers", "-w", type=parse_workers, default=1,
+                        help="Number of processes aggregating orders in parallel (workers > 0). Default: 1")
+    parser.add_argument("--parse-cache", "-pc", action="store_true",
+                        help="Store parsed input columns in binary sidecar files next to input CSV files "
+                             f"('{parsed_input_cache.SIDECAR_FILE_SUFFIX}' suffix), and load them instead of "
+                             "parsing CSV files when input files did not change. Timezone can change between runs")
+    parser.add_argument("--input-engine", "-ie", choices=[INPUT_ENGINE_CSV, INPUT_ENGINE_MMAP],
+                        default=INPUT_ENGINE_CSV,
+                        help="How input CSV files are read: 'csv' module over text files, or "
+                             "'mmap' byte-level scanner over memory-mapped files. "
+                             "Compressed files are always read with 'csv'. Default: 'csv'")
+
+    parser.add_argument("--since", "-s", type=parse_date,
+                        help="Aggregate only orders created on or after this UTC date. Format 'YYYY-MM-DD'")
+    parser.add_argument("--until", "-u", type=parse_date,
+                        help="Aggregate only orders created on or before this UTC date. Format 'YYYY-MM-DD'")
+    parser.add_argument("--save-index", "-si",
+                        help="Save the customer index built out of the customers CSV file into this binary file")
+    parser.add_argument("--load-index", "-li",
+                        help="Load the customer index from this binary file, saved with --save-index in the same "
+                             "timezone, instead of reading all customers from the customers CSV file")
 
     args: Dict[str, str] = parser.parse_args(args)
+    if args.since is not None and args.until is not None and args.since > args.until:
+        parser.error("--since date is after --until date")
+    if args.customers_file is None and args.load_index is None:
+        parser.error("One of --customers-file and --load-index is required")
+    if args.customers_file == input_streams.STDIN_PATH and args.orders_file == input_streams.STDIN_PATH:
+        parser.error("Only one input file can be read from the standard input")
 
     return args
 
 
 def generate_cohort_report(customers_csv_reader, orders_csv_reader, output_csv_writer, timezone: tzinfo,
-                           max_weeks: int) -> None:
+                           max_weeks: int, workers: int = 1, orders_file_path: str = None, since: date = None,
+                           until: date = None, load_index_path: str = None, save_index_path: str = None) -> None:
     """
     Perform all necessary steps to generate cohorts report.
 
-    :param customers_csv_reader: Input CSV file for customers records.
+    :param customers_csv_reader: Input CSV file for customers records. When the index is loaded, new customers to
+        append into the index, or `None`.
     :param orders_csv_reader: Input CSV file for orders records.
     :param output_csv_writer: Output file CSV writer.
     :param timezone: Defined timezone in form
     :param max_weeks: Maximum number of weeks to generate in the output file.
+    :param workers: Number of processes aggregating orders in parallel.
+    :param orders_file_path: Path to orders CSV file, split into byte ranges for parallel aggregation.
+        Parallel aggregation reads the file by itself, and `orders_csv_reader` is not used.
+    :param since: Aggregate only orders created on or after this UTC date.
+    :param until: Aggregate only orders created on or before this UTC date.
+    :param load_index_path: Load the customer index from this index file, instead of reading all customers.
+    :param save_index_path: Save the customer index into this index file.
     """
 
-    customers_reader = customers.CustomersReader(customers_csv_reader, timezone)
-    cohort_index_builder = cohort_customer_index.CohortCustomerSegmentsTreeBuilder(customers_reader)
-    print("Reading customers data: ...", end='')
-    cohort_index_builder.build()
-    customer_index_builder = customer_cohort_index.CustomerIndexBuilder(cohort_index_builder.cohorts)
+    if load_index_path is not None:
+        print("Loading customer index: ...", end='')
+        cohorts, segments = customer_index_file.load_customer_index(load_index_path, timezone)
+        if customers_csv_reader is not None:
+            cohort_index_builder = cohort_customer_index.CohortCustomerSegmentsTreeBuilder(
+                customers.CustomersReader(customers_csv_reader, timezone))
+            cohort_index_builder.build()
+            print(f"{len(cohort_index_builder.cohorts)} cohorts with new customers, ", end='')
+            cohorts, segments = customer_index_file.append_cohorts(cohorts, segments, cohort_index_builder.cohorts)
+        customer_index_builder = customer_cohort_index.CustomerIndexBuilder(cohorts, segments=segments)
+    else:
+        customers_reader = customers.CustomersReader(customers_csv_reader, timezone)
+        cohort_index_builder = cohort_customer_index.CohortCustomerSegmentsTreeBuilder(customers_reader)
+        print("Reading customers data: ...", end='')
+        cohort_index_builder.build()
+        customer_index_builder = customer_cohort_index.CustomerIndexBuilder(cohort_index_builder.cohorts)
     customer_index_builder.build()
-    print(f"{len(customer_index_builder.cohorts)} cohorts found.")
-
-    orders_reader = orders.OrdersReader(orders_csv_reader, timezone)
-
-    statistics_aggregator = cohort_statistics.CohortStatisticsAggregator(orders_reader,
-                                                                         customer_index_builder.customer_index,
-                                                                         max_weeks)
-    print("Aggregating statistics from orders CSV file: ...", end='')
+    print(f"{len(customer_index_builder.cohorts)} cohorts found, "
+          f"{customer_index_builder.customer_index.LOOKUP_STRATEGY} customer index.")
+
+    if save_index_path is not None:
+        customer_index_file.save_customer_index(save_index_path, customer_index_builder.customer_index, timezone)
+        print("Customer index saved: ", save_index_path)
+
+    date_filter = DateRangeFilter(since, until) if since is not None or until is not None else None
+
+    if workers > 1 and orders_file_path is not None:
+        statistics_aggregator = parallel_statistics.ParallelCohortStatisticsAggregator(
+            orders_file_path, customer_index_builder.customer_index, max_weeks, timezone, workers, date_filter)
+        print(f"Aggregating statistics from orders CSV file in {workers} processes: ...", end='')
+    else:
+        orders_reader = orders.OrdersReader(orders_csv_reader, timezone, date_filter)
+
+        statistics_aggregator = cohort_statistics.CohortStatisticsAggregator(orders_reader,
+                                                                             customer_index_builder.customer_index,
+                                                                             max_weeks)
+        print("Aggregating statistics from orders CSV file: ...", end='')
     statistics = statistics_aggregator.aggregate()
     print(f"{statistics.max_weeks_range} weeks of data processed.")
+    if date_filter is not None:
+        print(f"{date_filter.pruned_rows_count} orders out of the date range skipped.")
 
     print("Generating report...", end='')
     report_generator.ReportGenerator(statistics, customer_index_builder.customer_index,
                                      output_csv_writer).export_to_csv_file()
 
 
+def open_input_csv_reader(file_path: str, input_engine: str, exit_stack: ExitStack, parse_cache: bool = False):
+    """
+    Open the input CSV file with the selected input engine.
+
+    Compressed input files, the standard input and named pipes are read ahead on background threads, and read
+    with `csv.reader`. Parsed input cache is used only for regular files.
+
+    :param file_path: Path to the input CSV file.
+    :param input_engine: `INPUT_ENGINE_CSV` or `INPUT_ENGINE_MMAP`.
+    :param exit_stack: Closes the file when the report is generated.
+    :param parse_cache: Use parsed input cache sidecar file.
+    :return: `csv.reader` or `MappedCsvScanner`, or parsed input cache reader when `parse_cache` is set.
+    """
+
+    if input_engine == INPUT_ENGINE_MMAP and splittable_file_path(file_path) is not None:
+        csv_reader = exit_stack.enter_context(csv_scanner.MappedCsvScanner.open(file_path))
+    else:
+        csv_reader = csv.reader(exit_stack.enter_context(input_streams.open_text_input(file_path)))
+
+    if parse_cache and input_streams.is_regular_file(file_path):
+        return parsed_input_cache.open_csv_reader(csv_reader, file_path)
+    return csv_reader
+
+
+def splittable_file_path(file_path: str):
+    """
+    Parallel aggregation and the mmap input engine need an uncompressed regular file.
+
+    :param file_path: Path to the input CSV file.
+    :return: The `file_path` if it is an uncompressed regular file, otherwise `None`.
+    """
+
+    if input_streams.is_regular_file(file_path) and input_streams.detect_compression(file_path) is None:
+        return file_path
+    return None
+
+
 def main() -> None:
     """
     Invoked by the `__main__` script to put all together and generate report.
@@ -95,11 +222,25 @@ def main() -> None:
 
     print("Starting process.")
     try:
-        with open(args.customers_file) as customers_csv_file, open(args.orders_file) as orders_csv_file, open(
-                args.output_file, 'w') as output_file:
-            generate_cohort_report(csv.reader(customers_csv_file), csv.reader(orders_csv_file), csv.writer(output_file),
+        with ExitStack() as exit_stack:
+            customers_csv_reader = None
+            if args.customers_file is not None:
+                customers_csv_reader = open_input_csv_reader(args.customers_file, args.input_engine, exit_stack,
+                                                             args.parse_cache)
+            orders_csv_reader = open_input_csv_reader(args.orders_file, args.input_engine, exit_stack,
+                                                      args.parse_cache)
+            output_file = exit_stack.enter_context(open(args.output_file, 'w'))
+            generate_cohort_report(customers_csv_reader, orders_csv_reader, csv.writer(output_file),
                                    args.timezone,
-                                   args.max_weeks)
+                                   args.max_weeks,
+                                   workers=args.workers,
+                                   orders_file_path=splittable_file_path(args.orders_file),
+                                   since=args.since,
+                                   until=args.until,
+                                   load_index_path=args.load_index,
+                                   save_index_path=args.save_index)
         print("output file: ", args.output_file)
     except FileNotFoundError as err:
         print("Unable to open file: ", err.filename)
+    except customer_index_file.InvalidIndexFileError as err:
+        print("Unable to load customer index: ", err)
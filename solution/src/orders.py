@@ -1,7 +1,10 @@
 import collections.abc as collections
+from typing import Iterator
 from datetime import datetime, tzinfo
 
-from src.utils import parse_utc_datetime_with_timezone
+from src.parsed_input_cache import read_columns_batches
+from src.date_range_filter import DateRangeFilter
+from src.utils import calculate_week_id, locate_column, ColumnsBatch, DEFAULT_BATCH_SIZE
 
 
 class Order:
@@ -9,25 +12,62 @@ class Order:
     Order value object.
     """
 
-    def __init__(self, user_id: int, created: datetime) -> None:
+    __slots__ = ("user_id", "_created", "timestamp", "timezone", "week_id")
+
+    def __init__(self, user_id: int, created: datetime = None, week_id: int = None, timestamp: int = None,
+                 timezone: tzinfo = None) -> None:
         """
+        Orders read from CSV files are created out of `timestamp` and `week_id`, and `created` is materialized
+        only when accessed.
+
         :param user_id: Same as the `customer_id` in Customers object.
         :param created: Date when order was made by the user.
+        :param week_id: The week order was made in. Calculated from `created` if not set.
+        :param timestamp: Epoch seconds when order was made, used when `created` is not set.
+        :param timezone: Timezone to materialize `created` in out of `timestamp`.
         """
 
         self.user_id = user_id
-        self.created = created
+        self._created = created
+        self.timestamp = timestamp
+        self.timezone = timezone
+        self.week_id = calculate_week_id(created.date()) if week_id is None else week_id
+
+    @property
+    def created(self) -> datetime:
+        if self._created is None:
+            self._created = datetime.fromtimestamp(self.timestamp, self.timezone)
+        return self._created
 
 
 class OrdersReader:
     """
     Wrapper around the csv reader to read and parse orders row by row.
+
+    The csv reader can be `csv.reader`, `MappedCsvScanner`, or parsed input cache `ParsedColumns`.
+    Only the user ID and created columns are parsed. They are located by name in the header row, and
+    the column constants are used when the header row does not name them.
     """
 
-    def __init__(self, orders_csv_reader: collections.Iterator, orders_timezone: tzinfo) -> None:
+    USER_ID_COLUMN_NAME = "user_id"
+    CREATED_COLUMN_NAME = "created"
+    USER_ID_COLUMN = 2
+    CREATED_COLUMN = 3
+
+    def __init__(self, orders_csv_reader: collections.Iterator, orders_timezone: tzinfo,
+                 date_filter: DateRangeFilter = None) -> None:
+        """
+        :param orders_csv_reader: Orders csv reader, the header row is read right away.
+        :param orders_timezone: Timezone to calculate week IDs in.
+        :param date_filter: Keep only orders created within the date range, or `None` to keep all orders.
+        """
+
         self.orders_csv_reader = orders_csv_reader
         self.timezone = orders_timezone
+        self.date_filter = date_filter
         self.header_row = next(orders_csv_reader)
+        self.user_id_column = locate_column(self.header_row, self.USER_ID_COLUMN_NAME, self.USER_ID_COLUMN)
+        self.created_column = locate_column(self.header_row, self.CREATED_COLUMN_NAME, self.CREATED_COLUMN)
 
     def orders(self) -> Order:
         """
@@ -35,7 +75,18 @@ class OrdersReader:
 
         :return: Read and parsed order from the next row.
         """
-        for row in self.orders_csv_reader:
-            yield Order(int(row[2]), parse_utc_datetime_with_timezone(row[3], self.timezone))
 
+        for ids, timestamps, week_ids in self.order_batches():
+            for row_id, timestamp, week_id in zip(ids, timestamps, week_ids):
+                yield Order(row_id, week_id=week_id, timestamp=timestamp, timezone=self.timezone)
+
+    def order_batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[ColumnsBatch]:
+        """
+        Yield read and parsed orders in batches of parallel integer columns, without creating an object per row.
+
+        :param batch_size: Number of rows in a batch. The last batch can be shorter.
+        :return: Batches of user IDs, epoch seconds and week IDs as `array('q')` columns.
+        """
 
+        return read_columns_batches(self.orders_csv_reader, (self.user_id_column, self.created_column), self.timezone,
+                                    batch_size, self.date_filter)
@@ -0,0 +1,105 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import tzinfo
+from typing import Tuple
+
+import src.orders as orders
+import src.cohort_statistics as cohort_statistics
+import src.customer_cohort_index as customer_cohort_index
+import src.csv_scanner as csv_scanner
+from src.date_range_filter import DateRangeFilter
+
+# Worker process state, set once per process by `_initialize_worker`.
+_worker_state = {}
+
+
+def _initialize_worker(orders_file_path: str, customer_to_cohort_index: customer_cohort_index.CustomerSegmentsCohortIndex,
+                       config_max_weeks_range: int, timezone: tzinfo, date_filter: DateRangeFilter = None) -> None:
+    """
+    Process pool initializer: customer index is sent to each worker process only once.
+    """
+
+    _worker_state['orders_file_path'] = orders_file_path
+    _worker_state['customer_to_cohort_index'] = customer_to_cohort_index
+    _worker_state['config_max_weeks_range'] = config_max_weeks_range
+    _worker_state['timezone'] = timezone
+    _worker_state['date_filter'] = date_filter
+
+
+def _collect_byte_range(byte_range: Tuple[int, int]) -> Tuple[cohort_statistics.CohortStatistics, int]:
+    """
+    Worker task: aggregate orders within the byte range of the orders file into partial statistics.
+
+    :param byte_range: Newline-aligned (start, end) offsets.
+    :return: Partial statistics, not post-processed, and the number of rows pruned by the date filter.
+    """
+
+    date_filter = _worker_state['date_filter']
+    if date_filter is not None:
+        date_filter = DateRangeFilter(date_filter.since, date_filter.until)
+
+    with csv_scanner.MappedCsvScanner.open(_worker_state['orders_file_path']) as scanner:
+        # Reader reads the header row first, then the scanner skips to the range.
+        orders_reader = orders.OrdersReader(scanner, _worker_state['timezone'], date_filter)
+        scanner.set_range(*byte_range)
+
+        statistics = cohort_statistics.CohortStatisticsAggregator(orders_reader,
+                                                                  _worker_state['customer_to_cohort_index'],
+                                                                  _worker_state['config_max_weeks_range']).collect()
+    return statistics, date_filter.pruned_rows_count if date_filter is not None else 0
+
+
+class ParallelCohortStatisticsAggregator:
+    """
+    Aggregates statistics on multiple CPU cores.
+
+    Orders file is split into newline-aligned byte ranges, and each worker process aggregates partial
+    `CohortStatistics` for its range against the customer index. Partial statistics are merged into one object,
+    and post-processed once. The result is the same as of the `CohortStatisticsAggregator`.
+    """
+
+    def __init__(self, orders_file_path: str,
+                 customer_to_cohort_index: customer_cohort_index.CustomerSegmentsCohortIndex,
+                 config_max_weeks_range: int, timezone: tzinfo, workers: int,
+                 date_filter: DateRangeFilter = None) -> None:
+        """
+        :param orders_file_path: Path to orders CSV file. It has to be a regular file, to be split into ranges.
+        :param customer_to_cohort_index: Maps customer ID to its cohort ID.
+        :param config_max_weeks_range: Maximum number of cohort weeks to process orders, or `None` for no limit.
+        :param timezone: Timezone for date fields in the orders file.
+        :param workers: Number of worker processes.
+        :param date_filter: Keep only orders created within the date range, or `None` to keep all orders.
+            Rows pruned by workers are added up into its `pruned_rows_count`.
+        """
+
+        self.orders_file_path = orders_file_path
+        self.customer_to_cohort_index = customer_to_cohort_index
+        self.config_max_weeks_range = config_max_weeks_range
+        self.timezone = timezone
+        self.workers = workers
+        self.date_filter = date_filter
+
+    def aggregate(self) -> cohort_statistics.CohortStatistics:
+        """
+        Split orders file, aggregate ranges in worker processes, merge partial statistics, and post-process them.
+
+        :return: Newly created and aggregated statistics object.
+        """
+
+        with csv_scanner.MappedCsvScanner.open(self.orders_file_path) as scanner:
+            # Skip the header row.
+            next(scanner, None)
+            byte_ranges = scanner.split_ranges(self.workers)
+
+        statistics = cohort_statistics.CohortStatistics()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_initialize_worker,
+                                 initargs=(self.orders_file_path, self.customer_to_cohort_index,
+                                           self.config_max_weeks_range, self.timezone,
+                                           self.date_filter)) as executor:
+            for partial_statistics, pruned_rows_count in executor.map(_collect_byte_range, byte_ranges):
+                statistics.merge(partial_statistics)
+                if self.date_filter is not None:
+                    self.date_filter.pruned_rows_count += pruned_rows_count
+
+        statistics.post_processing()
+
+        return statistics
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import sys
+from array import array
+from datetime import tzinfo
+from typing import Iterator, List, Sequence, Tuple
+
+from src.csv_scanner import project_columns
+from src.date_range_filter import DateRangeFilter
+from src.utils import UtcTimestampParser, parse_columns_batches, ColumnsBatch, DEFAULT_BATCH_SIZE
+
+# Sidecar file is stored next to the input file, with this suffix added to the name.
+SIDECAR_FILE_SUFFIX = ".parsed"
+
+SIDECAR_MAGIC = b"COHPARSD"
+SIDECAR_VERSION = 1
+
+# magic, version, input file size, input file mtime (ns), input file content hash, header row length, rows count
+SIDECAR_HEADER = struct.Struct("<8sIQq16sIQ")
+
+# Files are hashed in chunks of this size.
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def sidecar_file_path(file_path: str) -> str:
+    """
+    :param file_path: Path to the input CSV file.
+    :return: Path to its parsed input cache sidecar file.
+    """
+
+    return file_path + SIDECAR_FILE_SUFFIX
+
+
+def file_content_hash(file_path: str) -> bytes:
+    """
+    :param file_path: Path to the input CSV file.
+    :return: BLAKE2 hash of the file content.
+    """
+
+    content_hash = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as input_file:
+        for chunk in iter(lambda: input_file.read(HASH_CHUNK_SIZE), b""):
+            content_hash.update(chunk)
+    return content_hash.digest()
+
+
+def file_fingerprint(file_path: str) -> Tuple[int, int, bytes]:
+    """
+    :param file_path: Path to the input CSV file.
+    :return: File size, modification time in nanoseconds, and BLAKE2 hash of the content.
+    """
+
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns, file_content_hash(file_path)
+
+
+def _little_endian(column: array) -> array:
+    """
+    Sidecar columns are stored little-endian, whatever the platform is.
+    """
+
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+class ParsedColumns:
+    """
+    Parsed input columns loaded from the sidecar file: IDs and UTC epoch seconds.
+
+    Used in place of the csv reader by `CustomersReader` and `OrdersReader`, and no CSV parsing happens at all.
+    Week IDs are calculated out of epoch seconds in the reader timezone, so the cache stays valid when the timezone
+    changes.
+
+    The iterator protocol returns the header row, same as the csv reader.
+    """
+
+    def __init__(self, header_row: List[str], ids: array, timestamps: array) -> None:
+        """
+        :param header_row: The header row of the input CSV file.
+        :param ids: Parsed ID column.
+        :param timestamps: Parsed created column, UTC epoch seconds.
+        """
+
+        self.header_row = header_row
+        self.ids = ids
+        self.timestamps = timestamps
+        self._header_read = False
+
+    def __iter__(self) -> ParsedColumns:
+        return self
+
+    def __next__(self) -> List[str]:
+        if self._header_read:
+            raise StopIteration
+        self._header_read = True
+        return self.header_row
+
+    @classmethod
+    def load(cls, file_path: str) -> ParsedColumns:
+        """
+        Load parsed columns of the input CSV file from its sidecar file.
+
+        :param file_path: Path to the input CSV file.
+        :return: Parsed columns, or `None` if the sidecar file does not exist, or it does not match the input file.
+        """
+
+        try:
+            with open(sidecar_file_path(file_path), "rb") as sidecar_file:
+                magic, version, file_size, file_mtime_ns, content_hash, header_row_length, rows_count = \
+                    SIDECAR_HEADER.unpack(sidecar_file.read(SIDECAR_HEADER.size))
+                if magic != SIDECAR_MAGIC or version != SIDECAR_VERSION:
+                    return None
+
+                # Cheap checks first, the content is hashed only if size and modification time match.
+                stat = os.stat(file_path)
+                if (file_size, file_mtime_ns) != (stat.st_size, stat.st_mtime_ns) or \
+                        content_hash != file_content_hash(file_path):
+                    return None
+
+                header_row = sidecar_file.read(header_row_length).decode().split(",")
+                ids = array('q')
+                ids.frombytes(sidecar_file.read(rows_count * ids.itemsize))
+                timestamps = array('q')
+                timestamps.frombytes(sidecar_file.read(rows_count * timestamps.itemsize))
+        except (FileNotFoundError, struct.error):
+            return None
+
+        if len(ids) != rows_count or len(timestamps) != rows_count:
+            return None
+
+        if sys.byteorder == "big":
+            ids.byteswap()
+            timestamps.byteswap()
+
+        return cls(header_row, ids, timestamps)
+
+    def columns_batches(self, timezone: tzinfo, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[ColumnsBatch]:
+        """
+        Slice parsed columns into batches, and calculate week IDs in the timezone.
+
+        :param timezone: Timezone to calculate week IDs in.
+        :param batch_size: Number of rows in a batch. The last batch can be shorter.
+        :return: Batches of IDs, epoch seconds and week IDs as `array('q')` columns.
+        """
+
+        week_id = UtcTimestampParser(timezone).week_id
+        for start in range(0, len(self.ids), batch_size):
+            timestamps = self.timestamps[start:start + batch_size]
+            yield self.ids[start:start + batch_size], timestamps, array('q', map(week_id, timestamps))
+
+
+class ParsedColumnsRecorder:
+    """
+    Wrapper around the csv reader that records parsed columns, and writes them into the sidecar file
+    once all rows are read.
+    """
+
+    def __init__(self, csv_reader: Iterator[Sequence], file_path: str) -> None:
+        """
+        :param csv_reader: `csv.reader` or `MappedCsvScanner`.
+        :param file_path: Path to the input CSV file.
+        """
+
+        self.csv_reader = csv_reader
+        self.file_path = file_path
+        self.header_row: List[str] = None
+
+        # Fingerprint is taken before reading, so the cache does not validate if the file changes in the meantime.
+        self.fingerprint = file_fingerprint(file_path)
+
+    def __iter__(self) -> ParsedColumnsRecorder:
+        return self
+
+    def __next__(self) -> List[str]:
+        # Only the header row is read through the iterator protocol.
+        self.header_row = next(self.csv_reader)
+        return self.header_row
+
+    def record(self, batches: Iterator[ColumnsBatch]) -> Iterator[ColumnsBatch]:
+        """
+        Pass parsed batches through, and write the sidecar file after the last one.
+
+        :param batches: Parsed batches.
+        :return: The same batches.
+        """
+
+        ids = array('q')
+        timestamps = array('q')
+        for batch in batches:
+            ids.extend(batch[0])
+            timestamps.extend(batch[1])
+            yield batch
+
+        self._write(ids, timestamps)
+
+    def _write(self, ids: array, timestamps: array) -> None:
+        """
+        Write the sidecar file. A temporary file is renamed at the end, so readers never see a partial file.
+        """
+
+        header_row = ",".join(self.header_row).encode()
+        file_size, file_mtime_ns, content_hash = self.fingerprint
+        sidecar_path = sidecar_file_path(self.file_path)
+        temporary_path = sidecar_path + ".tmp"
+        with open(temporary_path, "wb") as sidecar_file:
+            sidecar_file.write(SIDECAR_HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, file_size, file_mtime_ns,
+                                                   content_hash, len(header_row), len(ids)))
+            sidecar_file.write(header_row)
+            sidecar_file.write(_little_endian(ids).tobytes())
+            sidecar_file.write(_little_endian(timestamps).tobytes())
+        os.replace(temporary_path, sidecar_path)
+
+
+def read_columns_batches(csv_reader: Iterator[Sequence], columns: Tuple[int, int], timezone: tzinfo,
+                         batch_size: int = DEFAULT_BATCH_SIZE,
+                         date_filter: DateRangeFilter = None) -> Iterator[ColumnsBatch]:
+    """
+    Read ID and created columns in batches, whatever the source is.
+
+    CSV rows out of the `date_filter` range are dropped before parsing. The recorder parses all rows, since the
+    sidecar file has to contain the whole input file, and parsed batches are filtered afterward.
+
+    :param csv_reader: `csv.reader`, `MappedCsvScanner`, `ParsedColumns`, or `ParsedColumnsRecorder`.
+    :param columns: Indexes of ID and created columns in CSV rows.
+    :param timezone: Timezone to calculate week IDs in.
+    :param batch_size: Number of rows in a batch. The last batch can be shorter.
+    :param date_filter: Keep only rows created within the date range, or `None` to keep all rows.
+    :return: Batches of IDs, epoch seconds and week IDs as `array('q')` columns.
+    """
+
+    if isinstance(csv_reader, ParsedColumns):
+        batches = csv_reader.columns_batches(timezone, batch_size)
+    elif isinstance(csv_reader, ParsedColumnsRecorder):
+        batches = csv_reader.record(
+            parse_columns_batches(project_columns(csv_reader.csv_reader, columns), timezone, batch_size))
+    else:
+        rows = project_columns(csv_reader, columns)
+        if date_filter is not None:
+            rows = date_filter.filter_rows(rows)
+        return parse_columns_batches(rows, timezone, batch_size)
+
+    if date_filter is not None:
+        return date_filter.filter_batches(batches)
+    return batches
+
+
+def open_csv_reader(csv_reader: Iterator[Sequence], file_path: str) -> Iterator[Sequence]:
+    """
+    Replace the csv reader with parsed columns from the sidecar file if it is valid, otherwise wrap it into
+    the recorder that writes the sidecar file.
+
+    :param csv_reader: `csv.reader` or `MappedCsvScanner` for the input CSV file.
+    :param file_path: Path to the input CSV file.
+    :return: `ParsedColumns` or `ParsedColumnsRecorder`.
+    """
+
+    parsed_columns = ParsedColumns.load(file_path)
+    if parsed_columns is not None:
+        return parsed_columns
+    return ParsedColumnsRecorder(csv_reader, file_path)
@@ -59,13 +59,13 @@ class ReportGenerator:
 
         cohort_stats = self.statistics.cohorts[cohort_id]
 
-        min_week_id = cohort_stats['min_week_id']
         max_week_id = cohort_stats['max_week_id']
 
         # There are two rows per cohort.
-        # Initialize the whole row with empty strings.
-        row_weeks_users = ["" for i in range(max_week_id - min_week_id + 1)]
-        row_weeks_1st_users = ["" for i in range(max_week_id - min_week_id + 1)]
+        # Initialize the whole row with empty strings. Rows start with the cohort week, even when the first weeks
+        # have no orders (orders filtered out by the date range).
+        row_weeks_users = ["" for i in range(max_week_id - cohort_id + 1)]
+        row_weeks_1st_users = ["" for i in range(max_week_id - cohort_id + 1)]
 
         # Weeks are generated without a particular order, whatever order dictionary comes back with.
         for week_id, week_counter in cohort_stats['weeks'].items():
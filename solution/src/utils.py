@@ -1,6 +1,15 @@
 from __future__ import annotations
 
-from datetime import datetime, tzinfo, date, timedelta
+import re
+from array import array
+from bisect import bisect
+from datetime import datetime, tzinfo, date, timedelta, timezone as fixed_timezone
+from typing import Dict, Tuple, List, Iterator, Sequence, Union
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
 
 
 class ComparisonMixin:
@@ -8,6 +17,9 @@ class ComparisonMixin:
     Mostly used for objects in lists that will be sorter or searched.
     The class needs to implement __eq__ and __lt__ that are used by these methods.
     """
+
+    __slots__ = ()
+
     def __le__(self, other: ComparisonMixin) -> bool:
         return self.__lt__(other) or self.__eq__(other)
 
@@ -21,16 +33,28 @@ class ComparisonMixin:
         return not self.__lt__(other)
 
 
+FIXED_OFFSET_TIMEZONE_PATTERN = re.compile(r"^[+-]\d{4}$")
+
+
 def parse_timezone(timezone: str) -> tzinfo:
     """
-    Parse timezone string in format '[+|-]HHMM' (example: '-0500') into `tzinfo` object.
+    Parse timezone string into `tzinfo` object.
+
+    Accepted formats are the fixed offset '[+|-]HHMM' (example: '-0500'), and IANA timezone names
+    (example: 'America/Los_Angeles') which observe daylight saving time.
 
     :param timezone: Timezone to parse.
     :return: `tzinfo` object representing the timezone.
     """
 
-    # HACK(vinko): Parse any date to get timezone offset from string
-    return datetime.strptime("1971-02-02" + timezone, "%Y-%m-%d%z").tzinfo
+    if FIXED_OFFSET_TIMEZONE_PATTERN.match(timezone) or ZoneInfo is None:
+        # HACK(vinko): Parse any date to get timezone offset from string
+        return datetime.strptime("1971-02-02" + timezone, "%Y-%m-%d%z").tzinfo
+
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: '{timezone}'")
 
 
 def parse_utc_datetime_with_timezone(date_str: str, timezone: tzinfo) -> datetime:
@@ -73,3 +97,267 @@ def calculate_week_id(for_date: date) -> int:
     """
 
     return (week_start_date(for_date) - oldest_week_start).days // 7
+
+
+def week_start_date_by_week_id(week_id: int) -> date:
+    """
+    Inverse of `calculate_week_id`.
+
+    :param week_id: Number of weeks since Sunday, Jan, 3rd 1971.
+    :return: The Sunday the week starts on.
+    """
+
+    return oldest_week_start + timedelta(weeks=week_id)
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Days between Jan, 1st 1970 (Unix epoch) and the `oldest_week_start` Sunday.
+OLDEST_WEEK_START_EPOCH_DAY = oldest_week_start.toordinal() - EPOCH_ORDINAL
+
+# The only date/time layout the fast parsing path accepts: '%Y-%m-%d %H:%M:%S'
+DATETIME_STR_LENGTH = 19
+
+
+class UtcOffsetTransitions:
+    """
+    Sorted table of UTC offset transitions of a timezone with daylight saving time.
+
+    Calculating the UTC offset with `astimezone` for every row is expensive. Instead, the table is precomputed
+    over the whole years the data spans, and the offset for any timestamp is found with a single `bisect`.
+    The span grows lazily, whenever a timestamp outside of it comes in.
+    """
+
+    # Sampling step when searching for transitions. No timezone changes the offset twice within 6 hours.
+    SAMPLING_STEP_SECONDS = 6 * 60 * 60
+
+    def __init__(self, timezone: tzinfo) -> None:
+        """
+        :param timezone: Timezone to calculate offset transitions for.
+        """
+
+        self.timezone = timezone
+
+        # Epoch seconds the table covers: span_start <= timestamp < span_end.
+        self.span_start: int = None
+        self.span_end: int = None
+
+        # `utc_offsets[i]` is valid from `transition_timestamps[i]` until `transition_timestamps[i + 1]`.
+        # The first transition is always at `span_start`.
+        self.transition_timestamps: List[int] = []
+        self.utc_offsets: List[int] = []
+
+    def _utc_offset_at(self, timestamp: int) -> int:
+        """
+        The slow path, used only for building the table.
+        """
+
+        return int(datetime.fromtimestamp(timestamp, self.timezone).utcoffset().total_seconds())
+
+    def _find_transition(self, start: int, end: int) -> int:
+        """
+        Binary search for the exact second the offset changes between `start` and `end`.
+
+        :return: The first timestamp with the offset different from the offset at `start`.
+        """
+
+        start_offset = self._utc_offset_at(start)
+        while end - start > 1:
+            middle = (start + end) // 2
+            if self._utc_offset_at(middle) == start_offset:
+                start = middle
+            else:
+                end = middle
+        return end
+
+    def _build(self, span_start: int, span_end: int) -> None:
+        """
+        Sample the offsets over the span and collect all transitions.
+        """
+
+        transition_timestamps = [span_start]
+        utc_offsets = [self._utc_offset_at(span_start)]
+
+        previous_timestamp = span_start
+        for timestamp in range(span_start + self.SAMPLING_STEP_SECONDS, span_end + self.SAMPLING_STEP_SECONDS,
+                               self.SAMPLING_STEP_SECONDS):
+            timestamp = min(timestamp, span_end)
+            if self._utc_offset_at(timestamp) != utc_offsets[-1]:
+                transition_timestamp = self._find_transition(previous_timestamp, timestamp)
+                transition_timestamps.append(transition_timestamp)
+                utc_offsets.append(self._utc_offset_at(transition_timestamp))
+            previous_timestamp = timestamp
+
+        self.span_start = span_start
+        self.span_end = span_end
+        self.transition_timestamps = transition_timestamps
+        self.utc_offsets = utc_offsets
+
+    def _expand_span(self, timestamp: int) -> None:
+        """
+        Expand the span to the whole UTC year(s) up to and including the `timestamp`, and rebuild the table.
+        """
+
+        year = datetime.fromtimestamp(timestamp, fixed_timezone.utc).year
+        span_start = int(datetime(year, 1, 1, tzinfo=fixed_timezone.utc).timestamp())
+        span_end = int(datetime(year + 1, 1, 1, tzinfo=fixed_timezone.utc).timestamp())
+        if self.span_start is not None:
+            span_start = min(span_start, self.span_start)
+            span_end = max(span_end, self.span_end)
+
+        self._build(span_start, span_end)
+
+    def utc_offset_seconds(self, timestamp: int) -> int:
+        """
+        :param timestamp: Epoch seconds.
+        :return: UTC offset of the timezone at the `timestamp` in seconds.
+        """
+
+        if self.span_start is None or not self.span_start <= timestamp < self.span_end:
+            self._expand_span(timestamp)
+
+        return self.utc_offsets[bisect(self.transition_timestamps, timestamp) - 1]
+
+
+class UtcTimestampParser:
+    """
+    Fast path for parsing UTC date/time strings in the fixed '%Y-%m-%d %H:%M:%S' layout.
+
+    `parse_utc_datetime_with_timezone` and `calculate_week_id` allocate several `datetime`, `date` and
+    `timedelta` objects per row. This parser turns the string straight into integer epoch seconds and the
+    week ID using integer arithmetic only.
+
+    Input files contain a lot of rows per day, so the day part (`%Y-%m-%d`) is converted once and memoized.
+    """
+
+    def __init__(self, timezone: tzinfo) -> None:
+        """
+        :param timezone: Timezone in which the weeks are calculated.
+        """
+
+        self.timezone = timezone
+
+        # Fixed offset timezones have the offset for any date, timezones with daylight saving time do not.
+        utc_offset = timezone.utcoffset(None)
+        self.utc_offset_seconds = int(utc_offset.total_seconds()) if utc_offset is not None else None
+        self.utc_offset_transitions = UtcOffsetTransitions(timezone) if utc_offset is None else None
+
+        # Keys are the day prefixes of date/time strings, values are epoch seconds at the midnight of that day.
+        self._epoch_day_seconds_memo: Dict[Union[str, bytes], int] = {}
+
+    def _epoch_day_seconds(self, day: Union[str, bytes]) -> int:
+        """
+        Memo miss: convert '%Y-%m-%d' into epoch seconds at the midnight (UTC) of the day.
+
+        :param day: The day prefix of the date/time string.
+        :return: Epoch seconds.
+        """
+
+        epoch_day_seconds = (date(int(day[0:4]), int(day[5:7]), int(day[8:10])).toordinal() - EPOCH_ORDINAL) \
+            * SECONDS_PER_DAY
+        self._epoch_day_seconds_memo[day] = epoch_day_seconds
+        return epoch_day_seconds
+
+    def parse_timestamp(self, date_str: Union[str, bytes]) -> int:
+        """
+        Datetime format: %Y-%m-%d %H:%M:%S
+
+        Both `str` and `bytes` strings are supported, since `int` parses both of them.
+
+        Strings in any other layout are delegated to `parse_utc_datetime_with_timezone`, which raises the
+        `ValueError` the same way as the `strptime` path does.
+
+        :param date_str: UTC date/time string to parse.
+        :return: Epoch seconds.
+        """
+
+        if len(date_str) != DATETIME_STR_LENGTH:
+            if isinstance(date_str, bytes):
+                date_str = date_str.decode()
+            return int(parse_utc_datetime_with_timezone(date_str, fixed_timezone.utc).timestamp())
+
+        day = date_str[0:10]
+        epoch_day_seconds = self._epoch_day_seconds_memo.get(day)
+        if epoch_day_seconds is None:
+            epoch_day_seconds = self._epoch_day_seconds(day)
+
+        return epoch_day_seconds + int(date_str[11:13]) * 3600 + int(date_str[14:16]) * 60 + int(date_str[17:19])
+
+    def week_id(self, timestamp: int) -> int:
+        """
+        Same as `calculate_week_id` for the date of `timestamp` in the parser timezone.
+
+        :param timestamp: Epoch seconds.
+        :return: Number of weeks since Sunday, Jan, 3rd 1971.
+        """
+
+        if self.utc_offset_transitions is None:
+            utc_offset_seconds = self.utc_offset_seconds
+        else:
+            utc_offset_seconds = self.utc_offset_transitions.utc_offset_seconds(timestamp)
+
+        return ((timestamp + utc_offset_seconds) // SECONDS_PER_DAY - OLDEST_WEEK_START_EPOCH_DAY) // 7
+
+    def parse(self, date_str: Union[str, bytes]) -> Tuple[int, int]:
+        """
+        :param date_str: UTC date/time string to parse.
+        :return: Epoch seconds and the week ID.
+        """
+
+        timestamp = self.parse_timestamp(date_str)
+        return timestamp, self.week_id(timestamp)
+
+
+# Number of rows in a batch of parsed columns.
+def locate_column(header_row: Sequence[str], column_name: str, default_column: int) -> int:
+    """
+    Find the column by its name in the header row, so input files can have extra or reordered columns.
+
+    :param header_row: Header row of the CSV file.
+    :param column_name: Name of the column.
+    :param default_column: Index of the column when the header row does not name it.
+    :return: Index of the column.
+    """
+
+    for column, name in enumerate(header_row):
+        if name.strip().lstrip("\ufeff") == column_name:
+            return column
+    return default_column
+
+
+DEFAULT_BATCH_SIZE = 4096
+
+# Parallel integer columns: IDs, epoch seconds, and week IDs.
+ColumnsBatch = Tuple[array, array, array]
+
+
+def parse_columns_batches(rows: Iterator[Tuple[str, str]], timezone: tzinfo,
+                          batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[ColumnsBatch]:
+    """
+    Parse CSV rows into fixed-size batches of parallel integer columns, without creating an object per row.
+
+    :param rows: ID and UTC date/time fields of CSV rows, as `str` or `bytes`.
+    :param timezone: Timezone to calculate week IDs in.
+    :param batch_size: Number of rows in a batch. The last batch can be shorter.
+    :return: Batches of IDs, epoch seconds and week IDs as `array('q')` columns.
+    """
+
+    parser = UtcTimestampParser(timezone)
+    parse_timestamp = parser.parse_timestamp
+    week_id = parser.week_id
+
+    ids, timestamps, week_ids = array('q'), array('q'), array('q')
+    for row_id, created in rows:
+        timestamp = parse_timestamp(created)
+        ids.append(int(row_id))
+        timestamps.append(timestamp)
+        week_ids.append(week_id(timestamp))
+
+        if len(ids) == batch_size:
+            yield ids, timestamps, week_ids
+            ids, timestamps, week_ids = array('q'), array('q'), array('q')
+
+    if len(ids) > 0:
+        yield ids, timestamps, week_ids
@@ -1,3 +1,4 @@
+from datetime import date
 from typing import Dict
 from unittest import TestCase
 
@@ -28,6 +29,85 @@ class TestArgumentParsing(TestCase):
         self.assertEqual(fixtures['output_file_path'], args.output_file)
         self.assertEqual(utils.parse_timezone(fixtures['timezone']), args.timezone)
 
+    def test_parse_timezone_name(self):
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=America/Los_Angeles".split())
+
+        self.assertEqual(utils.parse_timezone("America/Los_Angeles"), args.timezone)
+
+    def test_invalid_timezone(self):
+        with tests.utils.suppress_stdout(), self.assertRaises(SystemExit) as systemExit:
+            parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=Nowhere".split())
+
+        self.assertEqual(2, systemExit.exception.code)
+
+    def test_input_engine(self):
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500".split())
+        self.assertEqual("csv", args.input_engine)
+
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500 "
+                          "--input-engine=mmap".split())
+        self.assertEqual("mmap", args.input_engine)
+
+    def test_workers(self):
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500".split())
+        self.assertEqual(1, args.workers)
+
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500 --workers=4".split())
+        self.assertEqual(4, args.workers)
+
+        with tests.utils.suppress_stdout(), self.assertRaises(SystemExit) as systemExit:
+            parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500 --workers=0".split())
+        self.assertEqual(2, systemExit.exception.code)
+
+    def test_parse_cache(self):
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500".split())
+        self.assertFalse(args.parse_cache)
+
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500 --parse-cache".split())
+        self.assertTrue(args.parse_cache)
+
+    def test_since_until(self):
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500".split())
+        self.assertIsNone(args.since)
+        self.assertIsNone(args.until)
+
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500 "
+                          "--since=2015-03-01 --until=2015-05-31".split())
+        self.assertEqual(date(2015, 3, 1), args.since)
+        self.assertEqual(date(2015, 5, 31), args.until)
+
+    def test_invalid_since_until(self):
+        for dates in ("--since=2015-03", "--until=03/01/2015", "--since=2015-05-31 --until=2015-03-01"):
+            with tests.utils.suppress_stdout(), self.assertRaises(SystemExit) as systemExit:
+                parse_argv(f"--customers-file=x --orders-file=x --output-file=x --timezone=-0500 {dates}".split())
+            self.assertEqual(2, systemExit.exception.code)
+
+    def test_stdin_inputs(self):
+        args = parse_argv("--customers-file=x --orders-file=- --output-file=x --timezone=-0500".split())
+        self.assertEqual("-", args.orders_file)
+
+        with tests.utils.suppress_stdout(), self.assertRaises(SystemExit) as systemExit:
+            parse_argv("--customers-file=- --orders-file=- --output-file=x --timezone=-0500".split())
+        self.assertEqual(2, systemExit.exception.code)
+
+    def test_customer_index_file(self):
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500".split())
+        self.assertIsNone(args.save_index)
+        self.assertIsNone(args.load_index)
+
+        args = parse_argv("--customers-file=x --orders-file=x --output-file=x --timezone=-0500 "
+                          "--save-index=x.index".split())
+        self.assertEqual("x.index", args.save_index)
+
+        args = parse_argv("--load-index=x.index --orders-file=x --output-file=x --timezone=-0500".split())
+        self.assertEqual("x.index", args.load_index)
+        self.assertIsNone(args.customers_file)
+
+        args = parse_argv("--customers-file=x --load-index=x.index --orders-file=x --output-file=x "
+                          "--timezone=-0500".split())
+        self.assertEqual("x", args.customers_file)
+        self.assertEqual("x.index", args.load_index)
+
     def test_invalid_max_weeks(self):
         with tests.utils.suppress_stdout(), self.assertRaises(SystemExit) as systemExit1:
             parse_argv(
@@ -0,0 +1,100 @@
+import os
+import random
+import unittest
+from typing import List, Tuple
+
+import src.cohort_customer_segment_tree as cohort_index
+
+# Set `STRESS_TESTS=1` to build cohorts of a million customer IDs, otherwise the same orders run with fewer IDs.
+CUSTOMERS_COUNT = 10 ** 6 if os.environ.get("STRESS_TESTS") else 10 ** 4
+
+# Deeper than the default recursion limit.
+TREE_DEPTH = 10 ** 4
+
+
+def expected_segments(customer_ids: List[int]) -> List[Tuple[int, int]]:
+    segments = []
+    for customer_id in sorted(set(customer_ids)):
+        if segments and segments[-1][1] + 1 == customer_id:
+            segments[-1] = (segments[-1][0], customer_id)
+        else:
+            segments.append((customer_id, customer_id))
+    return segments
+
+
+def bit_reversal_order(count: int) -> List[int]:
+    bits = count.bit_length()
+    return sorted(range(count), key=lambda index: int(format(index, f"0{bits}b")[::-1], 2))
+
+
+def deep_tree(depth: int) -> cohort_index.CohortCustomerSegmentsTreeBuilderNode:
+    """
+    Build the tree where every node has two children: the next deeper node, and the leaf above the deeper node range.
+
+    :return: The root node, with segment `(0, 0)`, and leaves with customer IDs from `10 * depth` down.
+    """
+
+    top = 10 * depth
+    node = cohort_index.CohortCustomerSegmentsTreeBuilderNode(depth)
+    for level in range(depth - 1, -1, -1):
+        parent = cohort_index.CohortCustomerSegmentsTreeBuilderNode(level)
+        parent.subtree = [node, cohort_index.CohortCustomerSegmentsTreeBuilderNode(top - level)]
+        parent.subtree_range_end = top - level
+        node = parent
+    return node
+
+
+class TestCohortCustomerSegmentsTreeStress(unittest.TestCase):
+
+    def assert_tree_matches(self, customer_ids: List[int]) -> None:
+        root = cohort_index.CohortCustomerSegmentsTreeBuilderRootNode()
+        for customer_id in customer_ids:
+            root.add_customer(customer_id)
+
+        segments = expected_segments(customer_ids)
+        self.assertEqual(len(set(customer_ids)), root.root_node.get_unique_customer_count())
+        for start, end in segments[::max(1, len(segments) // 1000)]:
+            self.assertTrue(root.root_node.has_customer_id(start))
+            self.assertTrue(root.root_node.has_customer_id(end))
+            self.assertFalse(root.root_node.has_customer_id(end + 1))
+
+        root.flatten()
+        self.assertEqual(segments, root.segments)
+
+    def test_descending_with_gaps_in_blocks(self):
+        # Every block of a thousand IDs is added in descending order, blocks in ascending order.
+        self.assert_tree_matches([(block * 1000 + 999 - offset) * 2 for block in range(CUSTOMERS_COUNT // 1000)
+                                  for offset in range(1000)])
+
+    def test_ascending_below_the_last_child(self):
+        # IDs with gaps between the root and the last child segment go down the first children.
+        self.assert_tree_matches([0, 100 * CUSTOMERS_COUNT, 10 * CUSTOMERS_COUNT] +
+                                 [2 * index + 3 for index in range(CUSTOMERS_COUNT)])
+
+    def test_bit_reversal_order(self):
+        self.assert_tree_matches([2 * index + 1 for index in bit_reversal_order(CUSTOMERS_COUNT)])
+
+    def test_random_order(self):
+        customer_ids = random.Random(11).sample(range(2 * CUSTOMERS_COUNT), CUSTOMERS_COUNT)
+        # Some IDs are added twice.
+        self.assert_tree_matches(customer_ids + customer_ids[::100])
+
+    def test_deep_tree(self):
+        node = deep_tree(TREE_DEPTH)
+        leaves = [10 * TREE_DEPTH - level for level in range(TREE_DEPTH)]
+
+        self.assertTrue(node.has_customer_id(TREE_DEPTH))
+        self.assertTrue(node.has_customer_id(leaves[-1]))
+        self.assertFalse(node.has_customer_id(TREE_DEPTH + 2))
+        self.assertEqual(2 * TREE_DEPTH + 1, node.get_unique_customer_count())
+
+        # Goes down to the deepest node, expands its segment end, and merges it with the leaf above.
+        node.add_customer(TREE_DEPTH + 1)
+        node.add_customer(TREE_DEPTH + 2)
+        for customer_id in range(TREE_DEPTH + 3, leaves[-1]):
+            node.add_customer(customer_id)
+
+        segments = []
+        node.flatten(segments.append)
+        self.assertEqual(expected_segments(list(range(0, leaves[-1])) + leaves), segments)
+        self.assertEqual(leaves[-1] + TREE_DEPTH, node.get_unique_customer_count())
@@ -125,3 +125,51 @@ class TestCohortStatistics(TestCase):
 
         self.assertEqual(2, unique_customers_count_1)
         self.assertEqual(3, unique_customers_count_2)
+
+    def test_aggregate_batches_same_as_order_by_order(self):
+        timezone = utils.parse_timezone("-0500")
+        customers_file_path = tests.utils.top_module_path() + "/e2e/fixtures/customers.csv"
+        orders_file_path = tests.utils.top_module_path() + "/e2e/fixtures/orders.csv"
+
+        with open(customers_file_path) as customers_csv_file:
+            cohort_index_builder = tests.utils.cohort_index_builder(customers_csv_file.read(), timezone)
+        cohort_index_builder.build()
+
+        customer_index_builder = customer_cohort_index.CustomerIndexBuilder(cohort_index_builder.cohorts)
+        customer_index_builder.build()
+
+        aggregated_statistics = []
+        for aggregate_method_name in ["aggregate", "aggregate_order_by_order"]:
+            with open(orders_file_path) as orders_csv_file:
+                orders_reader = orders.OrdersReader(csv.reader(orders_csv_file), timezone)
+                statistics_aggregator = cohort_statistics.CohortStatisticsAggregator(
+                    orders_reader, customer_index_builder.customer_index, 8)
+                aggregated_statistics.append(getattr(statistics_aggregator, aggregate_method_name)())
+
+        self.assertEqual(aggregated_statistics[1].max_weeks_range, aggregated_statistics[0].max_weeks_range)
+        self.assertEqual(aggregated_statistics[1].cohorts, aggregated_statistics[0].cohorts)
+
+    def test_merge_same_as_aggregate(self):
+        timezone = utils.parse_timezone("-0500")
+        cohort_index_builder = tests.utils.cohort_index_builder(customers_fixtures.FIVE_ROWS_ONE_COHORT, timezone)
+        cohort_index_builder.build()
+
+        customer_index_builder = customer_cohort_index.CustomerIndexBuilder(cohort_index_builder.cohorts)
+        customer_index_builder.build()
+
+        def collect(orders_csv_string: str) -> cohort_statistics.CohortStatistics:
+            orders_reader = orders.OrdersReader(csv.reader(io.StringIO(orders_csv_string)), timezone)
+            return cohort_statistics.CohortStatisticsAggregator(orders_reader,
+                                                                customer_index_builder.customer_index,
+                                                                None).collect()
+
+        header, *rows = orders_fixtures.SEVEN_ROWS_ONE_COHORT_TWO_WEEKS_WITH_OVERLAP.splitlines()
+        statistics = collect("\n".join([header] + rows[4:]))
+        statistics.merge(collect("\n".join([header] + rows[:4])))
+        statistics.post_processing()
+
+        expected_statistics = collect(orders_fixtures.SEVEN_ROWS_ONE_COHORT_TWO_WEEKS_WITH_OVERLAP)
+        expected_statistics.post_processing()
+
+        self.assertEqual(expected_statistics.max_weeks_range, statistics.max_weeks_range)
+        self.assertEqual(expected_statistics.cohorts, statistics.cohorts)
@@ -0,0 +1,100 @@
+import csv
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+import tests.fixtures.orders as orders_fixtures
+import tests.fixtures.customers as customers_fixtures
+
+from src import csv_scanner, orders, customers, utils
+
+
+class TestMappedCsvScanner(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def scanner(self, content: bytes) -> csv_scanner.MappedCsvScanner:
+        file_path = os.path.join(self.temp_dir.name, "input.csv")
+        with open(file_path, "wb") as csv_file:
+            csv_file.write(content)
+        scanner = csv_scanner.MappedCsvScanner.open(file_path)
+        self.addCleanup(scanner.close)
+        return scanner
+
+    def test_header_row(self):
+        scanner = self.scanner(orders_fixtures.THREE_ROWS.encode())
+        self.assertEqual(["id", "order_number", "user_id", "created"], next(scanner))
+        self.assertEqual(["1709", "36", "35410", "2015-07-03 00:20:01"], next(scanner))
+
+    def test_project_columns(self):
+        scanner = self.scanner(orders_fixtures.THREE_ROWS.encode())
+        next(scanner)
+        self.assertEqual([(b"35410", b"2015-07-03 00:20:01"),
+                          (b"35411", b"2015-07-03 23:44:53"),
+                          (b"35412", b"2015-07-03 17:47:07")], list(scanner.project_columns((2, 3))))
+
+    def test_project_columns_reordered(self):
+        scanner = self.scanner(orders_fixtures.THREE_ROWS.encode())
+        next(scanner)
+        self.assertEqual([(b"2015-07-03 00:20:01", b"1709")], list(scanner.project_columns((3, 0)))[:1])
+
+    def test_project_columns_windows_line_endings_and_empty_lines(self):
+        scanner = self.scanner(b"id,created\r\n35410,2015-07-03 22:01:11\r\n\r\n35411,2015-07-03 22:11:23")
+        next(scanner)
+        self.assertEqual([(b"35410", b"2015-07-03 22:01:11"), (b"35411", b"2015-07-03 22:11:23")],
+                         list(scanner.project_columns((0, 1))))
+
+    def test_project_columns_small_chunks(self):
+        scanner = self.scanner(customers_fixtures.FIVE_ROWS.encode())
+        scanner.CHUNK_SIZE = 30
+        next(scanner)
+        self.assertEqual([b"35410", b"35411", b"35412", b"35413", b"35414"],
+                         [row[0] for row in scanner.project_columns((0, 1))])
+
+    def test_project_columns_malformed_row(self):
+        scanner = self.scanner(b"id,created\n35410,2015-07-03 22:01:11\n35411\n")
+        next(scanner)
+        with self.assertRaises(ValueError):
+            list(scanner.project_columns((0, 1)))
+
+    def test_split_ranges(self):
+        scanner = self.scanner(orders_fixtures.FIVE_ROWS_TWO_WEEKS.encode())
+        next(scanner)
+        rows = list(scanner.project_columns((2, 3)))
+
+        for count in range(1, 8):
+            scanner.set_range(len(orders_fixtures.FIVE_ROWS_TWO_WEEKS.splitlines()[0]) + 1, scanner.end)
+            ranges = scanner.split_ranges(count)
+            self.assertLessEqual(len(ranges), count)
+
+            ranges_rows = []
+            for start, end in ranges:
+                self.assertEqual(ord("\n"), scanner.buffer[start - 1])
+                scanner.set_range(start, end)
+                ranges_rows.extend(scanner.project_columns((2, 3)))
+            self.assertEqual(rows, ranges_rows)
+
+    def test_empty_file(self):
+        scanner = self.scanner(b"")
+        with self.assertRaises(StopIteration):
+            next(scanner)
+
+    def test_readers_same_as_csv_reader(self):
+        timezone = utils.parse_timezone("-0500")
+        for reader_class, fixture, items in [
+            (orders.OrdersReader, orders_fixtures.FIVE_ROWS_TWO_WEEKS,
+             lambda reader: [(order.user_id, order.created, order.week_id) for order in reader.orders()]),
+            (customers.CustomersReader, customers_fixtures.FIVE_ROWS_TWO_COHORTS,
+             lambda reader: [(customer.customer_id, customer.created, customer.week_id)
+                             for customer in reader.customers()])
+        ]:
+            csv_reader = reader_class(csv.reader(io.StringIO(fixture)), timezone)
+            scanner_reader = reader_class(self.scanner(fixture.encode()), timezone)
+
+            self.assertEqual(csv_reader.header_row, scanner_reader.header_row)
+            self.assertEqual(items(csv_reader), items(scanner_reader))
@@ -1,3 +1,4 @@
+from array import array
 from unittest import TestCase, mock
 
 import tests.fixtures.customers as customers
@@ -43,3 +44,110 @@ class TestCustomerIndexBuilder(TestCase):
         self.assertEqual(2321, index.try_get_cohort_id_by_customer_id(35411))
         self.assertEqual(2326, index.try_get_cohort_id_by_customer_id(35414))
 
+
+    def test_find_cohort_id_interleaved_cohorts(self):
+        # Customer IDs alternate between three weekly cohorts, so cohort ID ranges interleave.
+        created_by_cohort = ["2015-07-01 10:00:00", "2015-07-08 10:00:00", "2015-07-15 10:00:00"]
+        rows = [f"{customer_id},{created_by_cohort[customer_id % 3]}" for customer_id in range(100, 130)]
+        cohort_builder = utils.cohort_index_builder("id,created\n" + "\n".join(rows) + "\n")
+        cohort_builder.build()
+
+        index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts).build()
+
+        cohort_ids = sorted(index.cohorts.keys())
+        self.assertEqual(3, len(cohort_ids))
+        self.assertEqual(30, len(index.segment_starts))
+        for customer_id in range(100, 130):
+            self.assertEqual(cohort_ids[customer_id % 3],
+                             index.try_get_cohort_id_by_customer_id(customer_id))
+
+    def test_find_cohort_id_unknown_customer(self):
+        cohort_builder = utils.cohort_index_builder(customers.FIVE_ROWS_ONE_COHORT_MULTI_SEGMENTS)
+        cohort_builder.build()
+
+        index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts).build()
+
+        self.assertIsNone(index.try_get_cohort_id_by_customer_id(index.min_customer_id - 1))
+        self.assertIsNone(index.try_get_cohort_id_by_customer_id(index.max_customer_id + 1))
+        for start, end in zip(index.segment_starts, index.segment_ends):
+            self.assertIsNotNone(index.try_get_cohort_id_by_customer_id(start))
+            self.assertIsNotNone(index.try_get_cohort_id_by_customer_id(end))
+        for end, next_start in zip(index.segment_ends, index.segment_starts[1:]):
+            for customer_id in range(end + 1, next_start):
+                self.assertIsNone(index.try_get_cohort_id_by_customer_id(customer_id))
+
+    def test_empty_index(self):
+        index = customer_cohort_index.CustomerIndexBuilder({}).build()
+        self.assertIsNone(index.try_get_cohort_id_by_customer_id(1))
+
+    def test_builder_picks_dense_index_for_compact_customer_ids(self):
+        cohort_builder = utils.cohort_index_builder(customers.FIVE_ROWS_TWO_COHORTS)
+        cohort_builder.build()
+
+        index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts).build()
+
+        self.assertIsInstance(index, customer_cohort_index.CustomerDenseCohortIndex)
+        self.assertEqual("dense", index.LOOKUP_STRATEGY)
+        self.assertEqual("H", index.table.typecode)
+        self.assertEqual(index.customer_ids_range(), len(index.table))
+        self.assertEqual(2321, index.try_get_cohort_id_by_customer_id(35411))
+        self.assertEqual(2326, index.try_get_cohort_id_by_customer_id(35414))
+
+    def test_builder_picks_segments_index_for_sparse_customer_ids(self):
+        cohort_builder = utils.cohort_index_builder("id,created\n1,2015-07-03 22:01:11\n1000,2015-07-03 22:11:23\n")
+        cohort_builder.build()
+
+        index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts).build()
+
+        self.assertNotIsInstance(index, customer_cohort_index.CustomerDenseCohortIndex)
+        self.assertEqual("segments", index.LOOKUP_STRATEGY)
+
+    def test_builder_respects_dense_memory_cap(self):
+        cohort_builder = utils.cohort_index_builder(customers.FIVE_ROWS_TWO_COHORTS)
+        cohort_builder.build()
+
+        index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts, dense_max_bytes=9).build()
+
+        self.assertEqual("segments", index.LOOKUP_STRATEGY)
+
+    def test_dense_index_matches_segments_index(self):
+        created_by_cohort = ["2015-07-01 10:00:00", "2015-07-08 10:00:00", "2015-07-15 10:00:00"]
+        rows = [f"{customer_id},{created_by_cohort[customer_id % 7 % 3]}" for customer_id in range(100, 160)
+                if customer_id % 5 != 0]
+        cohort_builder = utils.cohort_index_builder("id,created\n" + "\n".join(rows) + "\n")
+        cohort_builder.build()
+
+        segments_index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts, dense_min_density=2).build()
+        dense_index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts, dense_min_density=0).build()
+
+        self.assertEqual("segments", segments_index.LOOKUP_STRATEGY)
+        self.assertEqual("dense", dense_index.LOOKUP_STRATEGY)
+        for customer_id in range(90, 170):
+            self.assertEqual(segments_index.try_get_cohort_id_by_customer_id(customer_id),
+                             dense_index.try_get_cohort_id_by_customer_id(customer_id))
+
+    def test_try_get_cohort_ids_matches_single_lookups(self):
+        created_by_cohort = ["2015-07-01 10:00:00", "2015-07-08 10:00:00", "2015-07-15 10:00:00"]
+        rows = [f"{customer_id},{created_by_cohort[customer_id % 7 % 3]}" for customer_id in range(100, 160)
+                if customer_id % 5 != 0]
+        cohort_builder = utils.cohort_index_builder("id,created\n" + "\n".join(rows) + "\n")
+        cohort_builder.build()
+        customer_ids = array('q', [155, 90, 101, 170, 130, 101, 99, 159, 160, 120, 121])
+
+        numpy_options = [None] if customer_cohort_index.numpy is None else [None, customer_cohort_index.numpy]
+        for dense_min_density in (0, 2):
+            index = customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts,
+                                                               dense_min_density=dense_min_density).build()
+            expected_cohort_ids = [index.try_get_cohort_id_by_customer_id(customer_id) for customer_id in customer_ids]
+            expected_cohort_ids = [customer_cohort_index.NOT_FOUND_COHORT_ID if cohort_id is None else cohort_id
+                                   for cohort_id in expected_cohort_ids]
+            for numpy in numpy_options:
+                with mock.patch("src.customer_cohort_index.numpy", numpy):
+                    cohort_ids = index.try_get_cohort_ids(customer_ids)
+                    self.assertEqual("q", cohort_ids.typecode)
+                    self.assertEqual(expected_cohort_ids, list(cohort_ids))
+                    self.assertEqual([], list(index.try_get_cohort_ids(array('q'))))
+
+    def test_try_get_cohort_ids_empty_index(self):
+        index = customer_cohort_index.CustomerIndexBuilder({}).build()
+        self.assertEqual([customer_cohort_index.NOT_FOUND_COHORT_ID] * 2, list(index.try_get_cohort_ids([1, 2])))
@@ -0,0 +1,143 @@
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+
+import tests.fixtures.customers as customers
+from tests import utils
+
+import src.customer_cohort_index as customer_cohort_index
+import src.customer_index_file as customer_index_file
+from src.utils import parse_timezone
+
+TIMEZONE = parse_timezone("-0500")
+
+
+def customers_csv(rows) -> str:
+    return "id,created\n" + "".join(f"{row}\n" for row in rows)
+
+
+def interleaved_customers_rows() -> list:
+    created_by_cohort = ["2015-07-01 10:00:00", "2015-07-08 10:00:00", "2015-07-15 10:00:00"]
+    return [f"{customer_id},{created_by_cohort[customer_id % 7 % 3]}" for customer_id in range(100, 160)
+            if customer_id % 5 != 0]
+
+
+def interleaved_customers_csv() -> str:
+    return customers_csv(interleaved_customers_rows())
+
+
+class TestCustomerIndexFile(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.file_path = os.path.join(self.temp_dir.name, "customers.index")
+
+    def build_index(self, customers_csv: str, **builder_options) -> customer_cohort_index.CustomerSegmentsCohortIndex:
+        cohort_builder = utils.cohort_index_builder(customers_csv, TIMEZONE)
+        cohort_builder.build()
+        return customer_cohort_index.CustomerIndexBuilder(cohort_builder.cohorts, **builder_options).build()
+
+    def save_and_load(self, index: customer_cohort_index.CustomerSegmentsCohortIndex, **builder_options) \
+            -> customer_cohort_index.CustomerSegmentsCohortIndex:
+        customer_index_file.save_customer_index(self.file_path, index, TIMEZONE)
+        cohorts, segments = customer_index_file.load_customer_index(self.file_path, TIMEZONE)
+        return customer_cohort_index.CustomerIndexBuilder(cohorts, segments=segments, **builder_options).build()
+
+    def test_loaded_index_same_lookups(self):
+        for dense_min_density in (0, 2):
+            index = self.build_index(interleaved_customers_csv(), dense_min_density=dense_min_density)
+            loaded_index = self.save_and_load(index, dense_min_density=dense_min_density)
+
+            self.assertEqual(index.LOOKUP_STRATEGY, loaded_index.LOOKUP_STRATEGY)
+            self.assertEqual(list(index.segment_starts), list(loaded_index.segment_starts))
+            for customer_id in range(90, 170):
+                self.assertEqual(index.try_get_cohort_id_by_customer_id(customer_id),
+                                 loaded_index.try_get_cohort_id_by_customer_id(customer_id))
+            customer_ids = list(range(90, 170))
+            self.assertEqual(list(index.try_get_cohort_ids(customer_ids)),
+                             list(loaded_index.try_get_cohort_ids(customer_ids)))
+
+    def test_loaded_cohorts_same_report_info(self):
+        index = self.build_index(customers.FIVE_ROWS_TWO_COHORTS)
+        loaded_index = self.save_and_load(index)
+
+        self.assertEqual(sorted(index.cohorts.keys()), sorted(loaded_index.cohorts.keys()))
+        for cohort_id, cohort in index.cohorts.items():
+            loaded_cohort = loaded_index.cohorts[cohort_id]
+            self.assertEqual(cohort.cohort_week_start, loaded_cohort.cohort_week_start)
+            self.assertEqual(cohort.get_unique_customer_count(), loaded_cohort.get_unique_customer_count())
+
+    def test_empty_index(self):
+        loaded_index = self.save_and_load(customer_cohort_index.CustomerIndexBuilder({}).build())
+
+        self.assertEqual({}, loaded_index.cohorts)
+        self.assertIsNone(loaded_index.try_get_cohort_id_by_customer_id(1))
+
+    def test_loaded_index_can_be_pickled(self):
+        loaded_index = self.save_and_load(self.build_index(interleaved_customers_csv()), dense_min_density=2)
+
+        unpickled_index = pickle.loads(pickle.dumps(loaded_index))
+
+        self.assertEqual(list(loaded_index.segment_cohort_ids), list(unpickled_index.segment_cohort_ids))
+        self.assertEqual(loaded_index.try_get_cohort_id_by_customer_id(101),
+                         unpickled_index.try_get_cohort_id_by_customer_id(101))
+
+    def test_invalid_file(self):
+        for content in [b"", b"id,created\n1,2015-07-03 22:01:11\n" * 4]:
+            with open(self.file_path, "wb") as index_file:
+                index_file.write(content)
+            with self.assertRaises(customer_index_file.InvalidIndexFileError):
+                customer_index_file.load_customer_index(self.file_path, TIMEZONE)
+
+    def test_truncated_file(self):
+        customer_index_file.save_customer_index(self.file_path, self.build_index(customers.FIVE_ROWS_TWO_COHORTS),
+                                                TIMEZONE)
+        with open(self.file_path, "r+b") as index_file:
+            index_file.truncate(os.path.getsize(self.file_path) - 8)
+
+        with self.assertRaises(customer_index_file.InvalidIndexFileError):
+            customer_index_file.load_customer_index(self.file_path, TIMEZONE)
+
+    def test_other_timezone(self):
+        customer_index_file.save_customer_index(self.file_path, self.build_index(customers.FIVE_ROWS_TWO_COHORTS),
+                                                TIMEZONE)
+
+        with self.assertRaises(customer_index_file.InvalidIndexFileError):
+            customer_index_file.load_customer_index(self.file_path, parse_timezone("+0100"))
+
+    def append(self, index: customer_cohort_index.CustomerSegmentsCohortIndex, customers_csv_string: str) \
+            -> customer_cohort_index.CustomerSegmentsCohortIndex:
+        customer_index_file.save_customer_index(self.file_path, index, TIMEZONE)
+        cohorts, segments = customer_index_file.load_customer_index(self.file_path, TIMEZONE)
+        cohort_builder = utils.cohort_index_builder(customers_csv_string, TIMEZONE)
+        cohort_builder.build()
+        cohorts, segments = customer_index_file.append_cohorts(cohorts, segments, cohort_builder.cohorts)
+        return customer_cohort_index.CustomerIndexBuilder(cohorts, segments=segments, dense_min_density=2).build()
+
+    def assert_same_index(self, expected_index: customer_cohort_index.CustomerSegmentsCohortIndex,
+                          index: customer_cohort_index.CustomerSegmentsCohortIndex) -> None:
+        self.assertEqual(list(expected_index.segment_starts), list(index.segment_starts))
+        self.assertEqual(list(expected_index.segment_ends), list(index.segment_ends))
+        self.assertEqual(list(expected_index.segment_cohort_ids), list(index.segment_cohort_ids))
+        self.assertEqual(sorted(expected_index.cohorts.keys()), sorted(index.cohorts.keys()))
+        for cohort_id, cohort in expected_index.cohorts.items():
+            self.assertEqual(cohort.cohort_week_start, index.cohorts[cohort_id].cohort_week_start)
+            self.assertEqual(cohort.get_unique_customer_count(), index.cohorts[cohort_id].get_unique_customer_count())
+
+    def test_append_equals_build_from_scratch(self):
+        rows = interleaved_customers_rows() + ["160,2015-07-22 10:00:00", "161,2015-07-22 10:00:00",
+                                               "105,2015-07-08 10:00:00", "110,2015-07-01 10:00:00",
+                                               "90,2015-07-15 10:00:00", "170,2015-07-01 10:00:00"]
+        for split in (0, 20, 48, len(rows)):
+            index = self.append(self.build_index(customers_csv(rows[:split]), dense_min_density=2),
+                                customers_csv(rows[split:]))
+
+            self.assert_same_index(self.build_index(customers_csv(rows), dense_min_density=2), index)
+
+    def test_append_known_customers(self):
+        rows = interleaved_customers_rows()
+        index = self.append(self.build_index(customers_csv(rows), dense_min_density=2), customers_csv(rows[10:30]))
+
+        self.assert_same_index(self.build_index(customers_csv(rows), dense_min_density=2), index)
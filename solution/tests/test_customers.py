@@ -22,6 +22,7 @@ class TestCustomers(TestCase):
             self.assertEqual(35410, customer.customer_id)
             self.assertEqual(utils.parse_utc_datetime_with_timezone("2015-07-03 22:01:11", timezone),
                              customer.created)
+            self.assertEqual(utils.calculate_week_id(customer.created.date()), customer.week_id)
 
     def test_customers_read_three_rows(self):
         timezone = utils.parse_timezone("-0500")
@@ -33,3 +34,19 @@ class TestCustomers(TestCase):
             count += 1
 
         self.assertEqual(5, count)
+
+    def test_customer_batches(self):
+        timezone = utils.parse_timezone("-0500")
+        rows_reader = customers.CustomersReader(csv.reader(io.StringIO(customers_fixtures.FIVE_ROWS)), timezone)
+        batches_reader = customers.CustomersReader(csv.reader(io.StringIO(customers_fixtures.FIVE_ROWS)), timezone)
+
+        batches = list(batches_reader.customer_batches(batch_size=2))
+
+        self.assertEqual([2, 2, 1], [len(batch[0]) for batch in batches])
+        ids = [row_id for batch in batches for row_id in batch[0]]
+        timestamps = [timestamp for batch in batches for timestamp in batch[1]]
+        week_ids = [week_id for batch in batches for week_id in batch[2]]
+        for index, item in enumerate(rows_reader.customers()):
+            self.assertEqual(item.customer_id, ids[index])
+            self.assertEqual(int(item.created.timestamp()), timestamps[index])
+            self.assertEqual(item.week_id, week_ids[index])
@@ -0,0 +1,50 @@
+import csv
+import io
+from datetime import date
+from unittest import TestCase
+
+import tests.fixtures.orders as orders_fixtures
+
+from src import orders, utils
+from src.date_range_filter import DateRangeFilter
+
+
+class TestDateRangeFilter(TestCase):
+
+    ROWS = [("1", "2015-07-02 23:59:59"), ("2", "2015-07-03 00:00:00"), ("3", "2015-07-10 23:59:59"),
+            ("4", "2015-07-11 00:00:00")]
+
+    def test_filter_rows_inclusive_range(self):
+        date_filter = DateRangeFilter(date(2015, 7, 3), date(2015, 7, 10))
+        self.assertEqual(self.ROWS[1:3], list(date_filter.filter_rows(self.ROWS)))
+        self.assertEqual(2, date_filter.pruned_rows_count)
+
+    def test_filter_rows_open_ends(self):
+        self.assertEqual(self.ROWS[1:], list(DateRangeFilter(since=date(2015, 7, 3)).filter_rows(self.ROWS)))
+        self.assertEqual(self.ROWS[:3], list(DateRangeFilter(until=date(2015, 7, 10)).filter_rows(self.ROWS)))
+
+    def test_filter_rows_bytes(self):
+        date_filter = DateRangeFilter(date(2015, 7, 3), date(2015, 7, 10))
+        rows = [(row_id.encode(), created.encode()) for row_id, created in self.ROWS]
+        self.assertEqual(rows[1:3], list(date_filter.filter_rows(rows)))
+        self.assertEqual(2, date_filter.pruned_rows_count)
+
+    def test_filter_batches_matches_filter_rows(self):
+        timezone = utils.parse_timezone("-0500")
+        batches = utils.parse_columns_batches(iter(self.ROWS), timezone, batch_size=3)
+        batches_filter = DateRangeFilter(date(2015, 7, 3), date(2015, 7, 10))
+        rows_filter = DateRangeFilter(date(2015, 7, 3), date(2015, 7, 10))
+
+        filtered_batches = list(batches_filter.filter_batches(batches))
+        filtered_rows_batches = list(utils.parse_columns_batches(rows_filter.filter_rows(self.ROWS), timezone))
+
+        self.assertEqual([row for batch in filtered_rows_batches for row in zip(*batch)],
+                         [row for batch in filtered_batches for row in zip(*batch)])
+        self.assertEqual(rows_filter.pruned_rows_count, batches_filter.pruned_rows_count)
+
+    def test_orders_reader_filters_orders(self):
+        date_filter = DateRangeFilter(date(2015, 7, 4), date(2015, 8, 3))
+        orders_reader = orders.OrdersReader(csv.reader(io.StringIO(orders_fixtures.FIVE_ROWS_TWO_WEEKS)),
+                                            utils.parse_timezone("-0500"), date_filter)
+        self.assertEqual([35411, 35412, 35413], [order.user_id for order in orders_reader.orders()])
+        self.assertEqual(2, date_filter.pruned_rows_count)
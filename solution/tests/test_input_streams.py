@@ -0,0 +1,111 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import tempfile
+import threading
+from typing import Union
+from unittest import TestCase, mock, skipUnless
+
+import tests.fixtures.orders as orders_fixtures
+
+from src import input_streams, orders, utils
+
+
+class TestInputStreams(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def input_file(self, file_name: str, content: bytes) -> str:
+        file_path = os.path.join(self.temp_dir.name, file_name)
+        with open(file_path, "wb") as input_file:
+            input_file.write(content)
+        return file_path
+
+    def test_detect_compression(self):
+        content = orders_fixtures.THREE_ROWS.encode()
+        self.assertIsNone(input_streams.detect_compression(self.input_file("orders.csv", content)))
+        self.assertIsNone(input_streams.detect_compression(self.input_file("empty.csv", b"")))
+        self.assertEqual(input_streams.COMPRESSION_GZIP, input_streams.detect_compression(
+            self.input_file("orders.csv.gz", gzip.compress(content))))
+        self.assertEqual(input_streams.COMPRESSION_BZIP2, input_streams.detect_compression(
+            self.input_file("orders.csv.bz2", bz2.compress(content))))
+        self.assertEqual(input_streams.COMPRESSION_XZ, input_streams.detect_compression(
+            self.input_file("orders.csv.xz", lzma.compress(content))))
+
+    def test_open_text_input_decompresses(self):
+        content = orders_fixtures.THREE_ROWS.encode()
+        for file_name, compress in (("orders.csv", bytes), ("orders.csv.gz", gzip.compress),
+                                    ("orders.csv.bz2", bz2.compress), ("orders.csv.xz", lzma.compress)):
+            with input_streams.open_text_input(self.input_file(file_name, compress(content))) as text_input:
+                self.assertEqual(orders_fixtures.THREE_ROWS, text_input.read(), file_name)
+
+    def test_orders_reader_over_compressed_input(self):
+        file_path = self.input_file("orders.csv.gz", gzip.compress(orders_fixtures.THREE_ROWS.encode()))
+        with input_streams.open_text_input(file_path) as text_input:
+            orders_reader = orders.OrdersReader(csv.reader(text_input), utils.parse_timezone("-0500"))
+            self.assertEqual([35410, 35411, 35412], [order.user_id for order in orders_reader.orders()])
+
+    def test_background_read_stream_small_chunks(self):
+        content = bytes(range(256)) * 100
+        stream = input_streams.BackgroundReadStream(lambda: io.BytesIO(content), chunk_size=7, buffers_count=2)
+        with io.BufferedReader(stream, buffer_size=13) as buffered_stream:
+            self.assertEqual(content, buffered_stream.read())
+
+    def test_background_read_stream_raises_source_error(self):
+        file_path = self.input_file("orders.csv.gz", gzip.compress(orders_fixtures.THREE_ROWS.encode())[:-10])
+        with self.assertRaises(EOFError):
+            with input_streams.open_text_input(file_path) as text_input:
+                text_input.read()
+
+    def test_background_read_stream_closes_before_end(self):
+        stream = input_streams.BackgroundReadStream(lambda: io.BytesIO(b"x" * 1000), chunk_size=1, buffers_count=1)
+        self.assertEqual(b"x", stream.read(1))
+        stream.close()
+        self.assertFalse(stream._thread.is_alive())
+
+    def write_in_background(self, file_path: Union[str, int], content: bytes) -> None:
+        def write() -> None:
+            # Opening a named pipe for writing blocks until the reader opens it.
+            with open(file_path, "wb") as output_file:
+                for start in range(0, len(content), 5):
+                    output_file.write(content[start:start + 5])
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        self.addCleanup(writer.join)
+
+    def test_is_regular_file(self):
+        self.assertTrue(input_streams.is_regular_file(self.input_file("orders.csv", b"")))
+        self.assertFalse(input_streams.is_regular_file(input_streams.STDIN_PATH))
+        self.assertFalse(input_streams.is_regular_file(self.temp_dir.name))
+        self.assertFalse(input_streams.is_regular_file(os.path.join(self.temp_dir.name, "missing.csv")))
+
+    @skipUnless(hasattr(os, "mkfifo"), "Named pipes are not supported")
+    def test_open_text_input_named_pipe(self):
+        for compress in (bytes, gzip.compress, lzma.compress):
+            file_path = os.path.join(self.temp_dir.name, "orders.pipe")
+            os.mkfifo(file_path)
+            self.assertFalse(input_streams.is_regular_file(file_path))
+
+            self.write_in_background(file_path, compress(orders_fixtures.THREE_ROWS.encode()))
+            with input_streams.open_text_input(file_path) as text_input:
+                self.assertEqual(orders_fixtures.THREE_ROWS, text_input.read())
+            os.unlink(file_path)
+
+    def test_open_text_input_stdin(self):
+        read_fd, write_fd = os.pipe()
+        stdin_mock = mock.Mock()
+        stdin_mock.fileno.return_value = read_fd
+        self.write_in_background(write_fd, bz2.compress(orders_fixtures.THREE_ROWS.encode()))
+
+        with mock.patch("sys.stdin", stdin_mock), \
+                input_streams.open_text_input(input_streams.STDIN_PATH) as text_input:
+            self.assertEqual(orders_fixtures.THREE_ROWS, text_input.read())
+        os.close(read_fd)
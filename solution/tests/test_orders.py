@@ -20,6 +20,7 @@ class TestOrders(TestCase):
             self.assertEqual(344, order.user_id)
             self.assertEqual(utils.parse_utc_datetime_with_timezone("2014-10-28 00:20:01", timezone),
                              order.created)
+            self.assertEqual(utils.calculate_week_id(order.created.date()), order.week_id)
 
     def test_orders_read_three_rows(self):
         timezone = utils.parse_timezone("-0500")
@@ -31,3 +32,31 @@ class TestOrders(TestCase):
             count += 1
 
         self.assertEqual(3, count)
+
+    def test_order_batches(self):
+        timezone = utils.parse_timezone("-0500")
+        rows_reader = orders.OrdersReader(csv.reader(io.StringIO(orders_fixtures.THREE_ROWS)), timezone)
+        batches_reader = orders.OrdersReader(csv.reader(io.StringIO(orders_fixtures.THREE_ROWS)), timezone)
+
+        batches = list(batches_reader.order_batches(batch_size=2))
+
+        self.assertEqual([2, 1], [len(batch[0]) for batch in batches])
+        ids = [row_id for batch in batches for row_id in batch[0]]
+        timestamps = [timestamp for batch in batches for timestamp in batch[1]]
+        week_ids = [week_id for batch in batches for week_id in batch[2]]
+        for index, item in enumerate(rows_reader.orders()):
+            self.assertEqual(item.user_id, ids[index])
+            self.assertEqual(int(item.created.timestamp()), timestamps[index])
+            self.assertEqual(item.week_id, week_ids[index])
+
+    def test_orders_reader_locates_columns_by_header(self):
+        timezone = utils.parse_timezone("-0500")
+        csv_file = io.StringIO("created,extra,user_id\n2015-07-03 00:20:01,x,35410\n2015-07-03 23:44:53,y,35411\n")
+        orders_reader = orders.OrdersReader(csv.reader(csv_file), timezone)
+        self.assertEqual((2, 0), (orders_reader.user_id_column, orders_reader.created_column))
+
+        reordered_orders = list(orders_reader.orders())
+        expected_orders = list(orders.OrdersReader(csv.reader(io.StringIO(orders_fixtures.THREE_ROWS)),
+                                                   timezone).orders())[:2]
+        self.assertEqual([(order.user_id, order.timestamp) for order in expected_orders],
+                         [(order.user_id, order.timestamp) for order in reordered_orders])
@@ -0,0 +1,85 @@
+import csv
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+import tests.fixtures.orders as orders_fixtures
+import tests.fixtures.customers as customers_fixtures
+
+from src import parsed_input_cache, orders, customers, utils
+
+
+def read_batches(reader) -> list:
+    batches = reader.order_batches() if isinstance(reader, orders.OrdersReader) else reader.customer_batches()
+    return [(list(ids), list(timestamps), list(week_ids)) for ids, timestamps, week_ids in batches]
+
+
+class TestParsedInputCache(TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.file_path = os.path.join(self.temp_dir.name, "input.csv")
+
+    def write_file(self, content: str) -> None:
+        with open(self.file_path, "w") as csv_file:
+            csv_file.write(content)
+
+    def open_csv_reader(self, csv_file):
+        return parsed_input_cache.open_csv_reader(csv.reader(csv_file), self.file_path)
+
+    def cached_batches(self, reader_class, timezone) -> list:
+        with open(self.file_path) as csv_file:
+            return read_batches(reader_class(self.open_csv_reader(csv_file), timezone))
+
+    def test_cold_run_writes_sidecar(self):
+        self.write_file(orders_fixtures.FIVE_ROWS_TWO_WEEKS)
+        with open(self.file_path) as csv_file:
+            self.assertIsInstance(self.open_csv_reader(csv_file), parsed_input_cache.ParsedColumnsRecorder)
+
+        self.cached_batches(orders.OrdersReader, utils.parse_timezone("-0500"))
+
+        self.assertTrue(os.path.exists(parsed_input_cache.sidecar_file_path(self.file_path)))
+        with open(self.file_path) as csv_file:
+            parsed_columns = self.open_csv_reader(csv_file)
+        self.assertIsInstance(parsed_columns, parsed_input_cache.ParsedColumns)
+        self.assertEqual(["id", "order_number", "user_id", "created"], next(parsed_columns))
+
+    def test_warm_run_same_as_csv_in_any_timezone(self):
+        for reader_class, fixture in [(orders.OrdersReader, orders_fixtures.FIVE_ROWS_TWO_WEEKS),
+                                      (customers.CustomersReader, customers_fixtures.FIVE_ROWS_TWO_TIMEZONE_COHORTS)]:
+            self.write_file(fixture)
+            self.cached_batches(reader_class, utils.parse_timezone("-0500"))
+
+            for timezone in ["-0500", "+1000", "America/Los_Angeles"]:
+                tz = utils.parse_timezone(timezone)
+                self.assertEqual(read_batches(reader_class(csv.reader(io.StringIO(fixture)), tz)),
+                                 self.cached_batches(reader_class, tz))
+
+            os.remove(parsed_input_cache.sidecar_file_path(self.file_path))
+
+    def test_changed_file_invalidates_sidecar(self):
+        self.write_file(orders_fixtures.FIVE_ROWS_TWO_WEEKS)
+        self.cached_batches(orders.OrdersReader, utils.parse_timezone("-0500"))
+
+        self.write_file(orders_fixtures.THREE_ROWS)
+        self.assertIsNone(parsed_input_cache.ParsedColumns.load(self.file_path))
+
+    def test_changed_content_with_same_size_and_mtime_invalidates_sidecar(self):
+        self.write_file(orders_fixtures.THREE_ROWS)
+        self.cached_batches(orders.OrdersReader, utils.parse_timezone("-0500"))
+        stat = os.stat(self.file_path)
+
+        self.write_file(orders_fixtures.THREE_ROWS.replace("35410", "35419"))
+        os.utime(self.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.assertIsNone(parsed_input_cache.ParsedColumns.load(self.file_path))
+
+    def test_missing_or_corrupted_sidecar(self):
+        self.write_file(orders_fixtures.THREE_ROWS)
+        self.assertIsNone(parsed_input_cache.ParsedColumns.load(self.file_path))
+
+        with open(parsed_input_cache.sidecar_file_path(self.file_path), "wb") as sidecar_file:
+            sidecar_file.write(b"COHPARSD")
+        self.assertIsNone(parsed_input_cache.ParsedColumns.load(self.file_path))
@@ -1,5 +1,6 @@
 import csv
 import io
+from datetime import date
 from unittest import TestCase, mock
 
 import tests.utils
@@ -9,6 +10,7 @@ import tests.fixtures.customers as customers_fixtures
 import src.orders as orders
 from src import customer_cohort_index, cohort_statistics, report_generator
 import src.utils as utils
+from src.date_range_filter import DateRangeFilter
 
 
 class TestReportGenerator(TestCase):
@@ -37,3 +39,23 @@ class TestReportGenerator(TestCase):
         report_gen.export_to_csv_file()
 
         self.assertEqual(5, file_writer_mock.writerow.call_count)
+
+    def test_report_rows_start_with_cohort_week_when_first_weeks_are_filtered_out(self):
+        timezone = utils.parse_timezone("-0500")
+        cohort_index_builder = tests.utils.cohort_index_builder(customers_fixtures.FIVE_ROWS_ONE_COHORT, timezone)
+        cohort_index_builder.build()
+
+        customer_index_builder = customer_cohort_index.CustomerIndexBuilder(cohort_index_builder.cohorts)
+        customer_index_builder.build()
+
+        orders_reader = orders.OrdersReader(csv.reader(io.StringIO(orders_fixtures.FIVE_ROWS_ONE_COHORT_TWO_WEEKS)),
+                                            timezone, DateRangeFilter(since=date(2015, 7, 5)))
+        statistics = cohort_statistics.CohortStatisticsAggregator(orders_reader, customer_index_builder.customer_index,
+                                                                  None).aggregate()
+
+        file_writer_mock = mock.Mock()
+        report_generator.ReportGenerator(statistics, customer_index_builder.customer_index,
+                                         file_writer_mock).export_to_csv_file()
+
+        users_row = file_writer_mock.writerow.call_args_list[1][0][0]
+        self.assertEqual(["", "60.00% orderers (3)"], users_row[2:])
@@ -11,6 +11,15 @@ class TestUtils(TestCase):
     def test_timezone(self):
         self.assertEqual("UTC-05:00", utils.parse_timezone("-0500").tzname(None))
 
+    def test_timezone_name(self):
+        tz = utils.parse_timezone("America/Los_Angeles")
+        self.assertEqual("PDT", datetime(2015, 7, 3, tzinfo=tz).tzname())
+        self.assertEqual("PST", datetime(2015, 1, 3, tzinfo=tz).tzname())
+
+    def test_unknown_timezone_name(self):
+        with self.assertRaises(ValueError):
+            utils.parse_timezone("America/Nowhere")
+
     def test_parse_utc_datetime_with_timezone(self):
         tz = utils.parse_timezone("-0500")
         self.assertEqual(datetime(2015, 7, 3, hour=17, minute=1, second=11, tzinfo=tz),
@@ -25,6 +34,64 @@ class TestUtils(TestCase):
         for_date = utils.parse_utc_datetime_with_timezone("2015-07-05 22:01:11", tz).date()
         self.assertEqual(date(2015, 7, 5), utils.week_start_date(for_date))
 
+    def test_week_start_date_by_week_id(self):
+        for_date = date(2015, 7, 3)
+        self.assertEqual(utils.week_start_date(for_date),
+                         utils.week_start_date_by_week_id(utils.calculate_week_id(for_date)))
+
+
+class TestUtcTimestampParser(TestCase):
+
+    def test_parse_timestamp(self):
+        parser = utils.UtcTimestampParser(utils.parse_timezone("-0500"))
+        for date_str in ["2015-07-03 22:01:11", "1971-01-03 00:00:00", "2016-02-29 23:59:59"]:
+            self.assertEqual(int(utils.parse_utc_datetime_with_timezone(date_str, parser.timezone).timestamp()),
+                             parser.parse_timestamp(date_str))
+
+    def test_parse_timestamp_invalid_layout(self):
+        parser = utils.UtcTimestampParser(utils.parse_timezone("-0500"))
+        with self.assertRaises(ValueError):
+            parser.parse_timestamp("2015-07-03T22:01")
+
+    def test_week_id_matches_calculate_week_id(self):
+        for timezone in ["-0500", "+0000", "+0530", "-1100", "+1400"]:
+            tz = utils.parse_timezone(timezone)
+            parser = utils.UtcTimestampParser(tz)
+            for date_str in ["2015-07-04 04:59:59", "2015-07-05 05:00:00", "2015-07-05 22:01:11",
+                             "2015-07-11 23:59:59", "2015-07-12 00:00:00", "2019-12-31 12:00:00"]:
+                self.assertEqual(
+                    utils.calculate_week_id(utils.parse_utc_datetime_with_timezone(date_str, tz).date()),
+                    parser.parse(date_str)[1], f"{date_str} {timezone}")
+
+    def test_week_id_with_daylight_saving_time(self):
+        tz = utils.parse_timezone("America/Los_Angeles")
+        parser = utils.UtcTimestampParser(tz)
+        # Sunday midnight PDT is 07:00 UTC, and Sunday midnight PST is 08:00 UTC.
+        for date_str in ["2015-07-05 06:59:59", "2015-07-05 07:00:00", "2015-01-04 07:59:59", "2015-01-04 08:00:00",
+                         "2015-03-08 09:59:59", "2015-03-08 10:00:00", "2015-11-01 08:59:59", "2015-11-01 09:00:00",
+                         "2014-12-31 23:59:59", "2017-06-30 12:00:00"]:
+            self.assertEqual(
+                utils.calculate_week_id(utils.parse_utc_datetime_with_timezone(date_str, tz).date()),
+                parser.parse(date_str)[1], date_str)
+
+
+class TestUtcOffsetTransitions(TestCase):
+
+    def test_utc_offset_seconds(self):
+        transitions = utils.UtcOffsetTransitions(utils.parse_timezone("America/Los_Angeles"))
+        parser = utils.UtcTimestampParser(utils.parse_timezone("+0000"))
+
+        # DST started on Mar 8th 2015 at 10:00 UTC, and ended on Nov 1st 2015 at 09:00 UTC.
+        self.assertEqual(-8 * 3600, transitions.utc_offset_seconds(parser.parse_timestamp("2015-03-08 09:59:59")))
+        self.assertEqual(-7 * 3600, transitions.utc_offset_seconds(parser.parse_timestamp("2015-03-08 10:00:00")))
+        self.assertEqual(-7 * 3600, transitions.utc_offset_seconds(parser.parse_timestamp("2015-11-01 08:59:59")))
+        self.assertEqual(-8 * 3600, transitions.utc_offset_seconds(parser.parse_timestamp("2015-11-01 09:00:00")))
+        self.assertEqual(3, len(transitions.transition_timestamps))
+
+        # The span grows when data from other years comes in.
+        self.assertEqual(-7 * 3600, transitions.utc_offset_seconds(parser.parse_timestamp("2013-07-01 00:00:00")))
+        self.assertEqual(7, len(transitions.transition_timestamps))
+
 
 class ComparisonImplementation(utils.ComparisonMixin):
 